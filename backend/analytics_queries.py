@@ -0,0 +1,117 @@
+import asyncio
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from fastapi import HTTPException
+
+# Logical analytics sources and where each keeps the fields the dashboards filter and group on.
+ANALYTICS_SOURCES = {
+    "cases": {
+        "collection": "cases",
+        "label": "case",
+        "date": "date_occurred",
+        "violation_types": "violation_types",
+        "country": "location.country",
+        "region": "location.region",
+        "status": "status",
+        "title": "title",
+        "description": None,
+    },
+    "reports": {
+        "collection": "reports",
+        "label": "report",
+        "date": "incident_details.date",
+        "violation_types": "incident_details.violation_types",
+        "country": "incident_details.location.country",
+        "region": "incident_details.location.region",
+        "status": "status",
+        "title": "title",
+        "description": "incident_details.description",
+    },
+}
+
+# Cache namespaces bumped by writes to the source collections.
+SOURCE_NAMESPACES = tuple(source["collection"] for source in ANALYTICS_SOURCES.values())
+
+
+def _parse_bound(value: str, name: str, end_of_day: bool) -> datetime:
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {name} format. Use YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS.")
+    if "T" not in value:
+        parsed = parsed.replace(hour=23, minute=59, second=59, microsecond=999999) if end_of_day else parsed
+    return parsed
+
+
+def analytics_filters(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    year: Optional[str] = None,
+    location_country: Optional[str] = None,
+    location_region: Optional[str] = None,
+    violation_type: Optional[str] = None
+) -> Dict[str, Any]:
+    """Validate dashboard query parameters into one source-independent filter dict."""
+    start = _parse_bound(start_date, "start_date", False) if start_date else None
+    end = _parse_bound(end_date, "end_date", True) if end_date else None
+    if year:
+        # The dashboard sends an empty year when none is selected.
+        if not str(year).isdigit() or not 1 <= int(year) <= 9999:
+            raise HTTPException(status_code=400, detail="Invalid year. Use YYYY.")
+        year = int(year)
+        start = max(start, datetime(year, 1, 1)) if start else datetime(year, 1, 1)
+        year_end = datetime(year, 12, 31, 23, 59, 59, 999999)
+        end = min(end, year_end) if end else year_end
+    return {
+        "start": start,
+        "end": end,
+        "country": location_country or None,
+        "region": location_region or None,
+        "violation_type": violation_type or None,
+    }
+
+
+def analytics_key(name: str, filters: Dict[str, Any], **params: Hashable) -> tuple:
+    """Cache key for one endpoint and its normalized parameters; equivalent queries share an entry."""
+    return (name, tuple(sorted(filters.items())), tuple(sorted(params.items())))
+
+
+def source_match(source: Dict[str, Any], filters: Dict[str, Any]) -> Dict[str, Any]:
+    match = {}
+    dates = {}
+    if filters.get("start"):
+        dates["$gte"] = filters["start"]
+    if filters.get("end"):
+        dates["$lte"] = filters["end"]
+    if dates:
+        match[source["date"]] = dates
+    for key in ("country", "region"):
+        if filters.get(key):
+            match[source[key]] = filters[key]
+    if filters.get("violation_type"):
+        match[source["violation_types"]] = filters["violation_type"]
+    return match
+
+
+async def run_per_source(
+    db: Any,
+    build_pipeline: Callable[[str, Dict[str, Any]], List[Dict[str, Any]]],
+    sources: Optional[List[str]] = None
+) -> Dict[str, List[Dict[str, Any]]]:
+    """Run one pipeline per source concurrently; build_pipeline(name, source) returns its stages."""
+    names = sources or list(ANALYTICS_SOURCES)
+    results = await asyncio.gather(*(
+        db[ANALYTICS_SOURCES[name]["collection"]].aggregate(build_pipeline(name, ANALYTICS_SOURCES[name])).to_list(None)
+        for name in names
+    ))
+    return dict(zip(names, results))
+
+
+def merge_counts(results: Dict[str, List[Dict[str, Any]]]) -> Dict[Any, int]:
+    """Sum {"_id", "count"} rows from every source by _id."""
+    totals: Dict[Any, int] = {}
+    for rows in results.values():
+        for row in rows:
+            totals[row["_id"]] = totals.get(row["_id"], 0) + row["count"]
+    return totals
@@ -0,0 +1,76 @@
+"""Compare the old recursive serialize_doc + json encoding with serialization.dumps.
+
+Run from backend/: python benchmarks/bench_serialization.py [number_of_docs]
+"""
+import json
+import os
+import sys
+import timeit
+from datetime import datetime
+
+from bson import ObjectId
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from serialization import dumps, orjson  # noqa: E402
+
+
+def serialize_doc(doc):
+    if isinstance(doc, dict):
+        return {k: serialize_doc(v) for k, v in doc.items()}
+    elif isinstance(doc, list):
+        return [serialize_doc(item) for item in doc]
+    elif isinstance(doc, ObjectId):
+        return str(doc)
+    elif isinstance(doc, datetime):
+        return doc.isoformat()
+    else:
+        return doc
+
+
+def make_case(i):
+    now = datetime.utcnow()
+    return {
+        "_id": ObjectId(),
+        "case_id": f"PRM-{i:08d}",
+        "title": f"Case {i}",
+        "description": "Detailed description of the incident " * 10,
+        "violation_types": ["arbitrary_detention", "torture"],
+        "status": "new",
+        "priority": "high",
+        "location": {"country": "Palestine", "region": "Gaza", "city": None, "address": None,
+                     "geolocation": {"type": "Point", "coordinates": [34.46, 31.5]}},
+        "date_occurred": now,
+        "created_at": now,
+        "updated_at": now,
+        "attachments": [
+            {"filename": f"{ObjectId()}.jpg", "filepath": "uploads/x.jpg", "mimetype": "image/jpeg",
+             "size": 123456, "uploaded_at": now} for _ in range(3)
+        ],
+        "case_status_history": [
+            {"old_status": None, "new_status": "new", "change_date": now, "changed_by": "Initial Creation"}
+        ],
+    }
+
+
+def old_path(docs):
+    # JSONResponse.render() default settings
+    return json.dumps([serialize_doc(d) for d in docs], ensure_ascii=False, allow_nan=False,
+                      indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def new_path(docs):
+    return dumps(docs)
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    docs = [make_case(i) for i in range(count)]
+    assert json.loads(old_path(docs)) == json.loads(new_path(docs))
+    runs = 10
+    old = min(timeit.repeat(lambda: old_path(docs), number=1, repeat=runs))
+    new = min(timeit.repeat(lambda: new_path(docs), number=1, repeat=runs))
+    backend = "orjson" if orjson is not None else "stdlib json"
+    print(f"{count} cases, best of {runs}")
+    print(f"  serialize_doc + json.dumps: {old * 1000:8.2f} ms")
+    print(f"  serialization.dumps ({backend}): {new * 1000:8.2f} ms  ({old / new:.1f}x)")
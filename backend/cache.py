@@ -0,0 +1,141 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple, Union
+
+# "memory" keeps invalidation per process; "mongo" shares version counters between workers.
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+
+
+class TTLCache:
+    def __init__(self, maxsize: int = 256, ttl: float = 300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            return default
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# Namespace versions describe the data (a collection changed), so every cache in the process shares them.
+_versions: Dict[str, int] = {}
+
+
+class VersionedCache:
+    """TTL/LRU cache whose entries are keyed by a per-namespace version bumped on writes.
+
+    Concurrent misses for the same key share one computation.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 300, backend: str = CACHE_BACKEND):
+        self.entries = TTLCache(maxsize, ttl)
+        self.backend = backend
+        self._versions = _versions
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    async def version(self, db: Any, namespace: Union[str, Tuple[str, ...]]) -> Any:
+        """Version of one namespace, or a tuple of versions when the entry depends on several."""
+        if isinstance(namespace, tuple):
+            if self.backend == "mongo":
+                docs = await db["cache_versions"].find({"_id": {"$in": list(namespace)}}).to_list(length=None)
+                found = {doc["_id"]: doc["version"] for doc in docs}
+                return tuple(found.get(name, 0) for name in namespace)
+            return tuple(self._versions.get(name, 0) for name in namespace)
+        if self.backend == "mongo":
+            doc = await db["cache_versions"].find_one({"_id": namespace})
+            return doc["version"] if doc else 0
+        return self._versions.get(namespace, 0)
+
+    async def bump(self, db: Any, *namespaces: str):
+        for namespace in namespaces:
+            self._versions[namespace] = self._versions.get(namespace, 0) + 1
+            if self.backend == "mongo":
+                await db["cache_versions"].update_one({"_id": namespace}, {"$inc": {"version": 1}}, upsert=True)
+
+    async def get_or_compute(
+        self,
+        db: Any,
+        namespace: Union[str, Tuple[str, ...]],
+        key: Hashable,
+        compute: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        cache_key = (namespace, await self.version(db, namespace), key)
+        missing = object()
+        while True:
+            value = self.entries.get(cache_key, missing)
+            if value is not missing:
+                self.hits += 1
+                return value
+            pending = self._inflight.get(cache_key)
+            if pending is None:
+                break
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                # Only retry when the computing request was cancelled, not this one.
+                if not pending.cancelled():
+                    raise
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[cache_key] = future
+        try:
+            value = await compute()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception retrieved so an unawaited future does not log it again.
+            future.exception()
+            raise
+        else:
+            self.entries.set(cache_key, value)
+            future.set_result(value)
+            return value
+        finally:
+            del self._inflight[cache_key]
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self.entries),
+            "maxsize": self.entries.maxsize,
+            "ttl": self.entries.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_ratio": (self.hits + self.coalesced) / lookups if lookups else None,
+        }
+
+
+lookup_cache = VersionedCache(maxsize=128, ttl=float(os.getenv("LOOKUP_CACHE_TTL", 300)))
+analytics_cache = VersionedCache(
+    maxsize=int(os.getenv("ANALYTICS_CACHE_SIZE", 256)),
+    ttl=float(os.getenv("ANALYTICS_CACHE_TTL", 60))
+)
@@ -0,0 +1,201 @@
+import asyncio
+import itertools
+import logging
+import os
+from collections import deque
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from pymongo.errors import OperationFailure
+
+from projection import HIDDEN_FIELDS, ID_FIELDS
+
+logger = logging.getLogger(__name__)
+
+# "auto" uses MongoDB change streams and falls back to the in-process bus on servers without
+# a replica set; "memory" always uses the bus (single process, tests); "changestream" never falls back.
+CHANGE_FEED = os.getenv("CHANGE_FEED", "auto")
+FEED_COLLECTIONS = tuple(ID_FIELDS)
+HEARTBEAT_SECONDS = 15
+SUBSCRIBER_QUEUE_SIZE = 1000
+REPLAY_BUFFER_SIZE = 1000
+
+
+def make_event(
+    collection: str,
+    operation: str,
+    doc_id: Any,
+    status: Optional[str] = None,
+    fields: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    event = {"collection": collection, "operation": operation, "id": doc_id, "at": datetime.utcnow()}
+    if status is not None:
+        event["status"] = status
+    if fields is not None:
+        event["fields"] = sorted(f for f in fields if f.split(".")[0] not in HIDDEN_FIELDS)
+    return event
+
+
+class EventBus:
+    """In-process fan-out of change events with a short replay buffer for Last-Event-ID resumes."""
+
+    def __init__(self):
+        self._sequence = itertools.count(1)
+        self._last_id = 0
+        self._recent = deque(maxlen=REPLAY_BUFFER_SIZE)
+        self._subscribers = set()
+
+    def publish(self, event: Dict[str, Any]):
+        self._last_id = next(self._sequence)
+        event = dict(event, event_id=str(self._last_id))
+        self._recent.append(event)
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # A subscriber this far behind has to refetch rather than hold everyone's memory.
+                # Drop its oldest event to make room for the sentinel that ends its stream.
+                self._subscribers.discard(queue)
+                queue.get_nowait()
+                queue.put_nowait(None)
+
+    def replay(self, last_event_id: Optional[str]) -> Optional[List[Dict[str, Any]]]:
+        """Events after last_event_id, or None if they are no longer buffered."""
+        if not last_event_id:
+            return []
+        if not last_event_id.isdigit():
+            return None
+        last = int(last_event_id)
+        # An id from before a restart, or one that has scrolled out of the buffer, cannot be resumed.
+        if last > self._last_id or (self._recent and int(self._recent[0]["event_id"]) > last + 1):
+            return None
+        return [event for event in self._recent if int(event["event_id"]) > last]
+
+    async def subscribe(self, last_event_id: Optional[str] = None) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """Yield events as they arrive; None means nothing arrived within the heartbeat interval.
+
+        A "reset" event is yielded when the subscriber missed events and must refetch.
+        """
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.add(queue)
+        try:
+            missed = self.replay(last_event_id)
+            if missed is None:
+                yield {"operation": "reset", "event_id": None}
+                missed = []
+            for event in missed:
+                yield event
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if event is None:
+                    yield {"operation": "reset", "event_id": None}
+                    return
+                yield event
+        finally:
+            self._subscribers.discard(queue)
+
+
+event_bus = EventBus()
+
+
+def publish(collection: str, operation: str, doc_id: Any, status: Optional[str] = None, fields: Optional[List[str]] = None):
+    """Notify subscribers of a committed write; never raises into the write path."""
+    try:
+        event_bus.publish(make_event(collection, operation, doc_id, status, fields))
+    except Exception:
+        logger.exception("Failed to publish %s %s event for %s", collection, operation, doc_id)
+
+
+def change_to_event(change: Dict[str, Any]) -> Dict[str, Any]:
+    collection = change["ns"]["coll"]
+    document = change.get("fullDocument") or {}
+    # Deletes carry no fullDocument; their case_id/report_id comes from the pre-image.
+    before = change.get("fullDocumentBeforeChange") or {}
+    doc_id = document.get(ID_FIELDS[collection]) or before.get(ID_FIELDS[collection]) or str(change["documentKey"]["_id"])
+    operation = change["operationType"]
+    fields = None
+    if operation == "update":
+        fields = list((change.get("updateDescription") or {}).get("updatedFields") or {})
+        if "status" in fields:
+            operation = "status"
+    elif operation == "replace":
+        operation = "update"
+    event = make_event(collection, operation, doc_id, document.get("status"), fields)
+    event["event_id"] = change["_id"]["_data"]
+    return event
+
+
+async def open_change_stream(db: Any, collections: List[str], last_event_id: Optional[str] = None) -> Any:
+    """Start watching now, so an unknown or expired resume token fails before a response is sent."""
+    pipeline = [
+        {"$match": {
+            "ns.coll": {"$in": collections},
+            "operationType": {"$in": ["insert", "update", "replace", "delete"]},
+        }},
+        {"$project": {
+            "ns": 1, "operationType": 1, "documentKey": 1, "updateDescription.updatedFields": 1,
+            **{f"fullDocument.{field}": 1 for field in ID_FIELDS.values()},
+            **{f"fullDocumentBeforeChange.{field}": 1 for field in ID_FIELDS.values()},
+            "fullDocument.status": 1,
+        }},
+    ]
+    options = {"full_document_before_change": "whenAvailable"} if _pre_images_enabled else {}
+    stream = db.watch(
+        pipeline,
+        full_document="updateLookup",
+        resume_after={"_data": last_event_id} if last_event_id else None,
+        max_await_time_ms=HEARTBEAT_SECONDS * 1000,
+        **options
+    )
+    # Entering the stream runs the aggregate that validates the resume token.
+    return await stream.__aenter__()
+
+
+async def change_stream_events(stream: Any) -> AsyncIterator[Optional[Dict[str, Any]]]:
+    """Events from a stream opened by open_change_stream(); the stream is closed when iteration ends."""
+    try:
+        while stream.alive:
+            change = await stream.try_next()
+            yield change_to_event(change) if change else None
+    finally:
+        await stream.close()
+
+
+_pre_images_enabled = False
+
+
+async def enable_pre_images(db: Any):
+    """Record pre-images on the feed collections so delete events can name the deleted case or report.
+
+    Needs MongoDB 6.0; older servers keep working and report deletes by ObjectId.
+    """
+    global _pre_images_enabled
+    if not await use_change_streams(db):
+        return
+    try:
+        for collection in FEED_COLLECTIONS:
+            await db.command("collMod", collection, changeStreamPreAndPostImages={"enabled": True})
+    except OperationFailure as e:
+        logger.warning("Change stream pre-images unavailable (%s); delete events will carry ObjectIds.", e)
+        return
+    _pre_images_enabled = True
+
+
+_change_streams_supported: Optional[bool] = None
+
+
+async def use_change_streams(db: Any) -> bool:
+    global _change_streams_supported
+    if CHANGE_FEED != "auto":
+        return CHANGE_FEED == "changestream"
+    if _change_streams_supported is None:
+        hello = await db.command("hello")
+        # Change streams need a replica set or a sharded cluster.
+        _change_streams_supported = "setName" in hello or hello.get("msg") == "isdbgrid"
+        if not _change_streams_supported:
+            logger.warning("MongoDB has no replica set; the change feed only sees writes made by this process.")
+    return _change_streams_supported
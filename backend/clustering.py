@@ -0,0 +1,90 @@
+import os
+from collections import Counter
+from typing import Any, Dict, List
+
+from geo import GEO_FIELD
+from vocabulary import term_key, term_label, term_labels
+
+# Grid cells are about this many screen pixels wide on a 256px-tile web map at the requested zoom.
+CLUSTER_CELL_PIXELS = 64
+# From this zoom level on, /analytics/geodata returns individual points instead of clusters.
+POINTS_ZOOM = int(os.getenv("GEODATA_POINTS_ZOOM", 12))
+# Points returned per source for one viewport at or above POINTS_ZOOM.
+GEODATA_POINT_LIMIT = 5000
+MAX_ZOOM = 22
+TOP_VIOLATION_TYPES = 3
+
+
+def cell_size(zoom: int) -> float:
+    """Cell edge in degrees; the grid is in plain lng/lat, so cells get taller on screen towards the poles."""
+    return 360 / 2 ** zoom * CLUSTER_CELL_PIXELS / 256
+
+
+def cluster_pipeline(source: Dict[str, Any], match: Dict[str, Any], cell: float) -> List[Dict[str, Any]]:
+    """Group matching documents per (grid cell, violation type).
+
+    Only the first unwound row of each document adds to documents/lng/lat, so
+    merge_clusters can recover per-cell document counts and centroids.
+    """
+    first = {"$gt": ["$position", 0]}
+    return [
+        {"$match": match},
+        {"$project": {
+            "lng": {"$arrayElemAt": [f"${GEO_FIELD}.coordinates", 0]},
+            "lat": {"$arrayElemAt": [f"${GEO_FIELD}.coordinates", 1]},
+            "type": f"${source['violation_types']}",
+        }},
+        {"$unwind": {"path": "$type", "includeArrayIndex": "position", "preserveNullAndEmptyArrays": True}},
+        {"$group": {
+            "_id": {
+                "x": {"$floor": {"$divide": [{"$add": ["$lng", 180]}, cell]}},
+                "y": {"$floor": {"$divide": [{"$add": ["$lat", 90]}, cell]}},
+                "type": "$type",
+            },
+            "count": {"$sum": 1},
+            "documents": {"$sum": {"$cond": [first, 0, 1]}},
+            "lng": {"$sum": {"$cond": [first, 0, "$lng"]}},
+            "lat": {"$sum": {"$cond": [first, 0, "$lat"]}},
+        }},
+    ]
+
+
+def merge_clusters(results: Dict[str, List[Dict[str, Any]]], labels: Dict[str, str], cell: float) -> List[Dict[str, Any]]:
+    """Combine per-source cluster_pipeline rows into one cluster per grid cell, largest first."""
+    cells: Dict[tuple, Dict[str, Any]] = {}
+    for name, rows in results.items():
+        for row in rows:
+            key = (int(row["_id"]["x"]), int(row["_id"]["y"]))
+            entry = cells.setdefault(key, {
+                "count": 0, "lng": 0.0, "lat": 0.0, "types": Counter(), "labels": Counter(), "sources": Counter()
+            })
+            entry["count"] += row["documents"]
+            entry["lng"] += row["lng"]
+            entry["lat"] += row["lat"]
+            entry["sources"][labels[name]] += row["documents"]
+            # Types may be plain strings or multilingual {"en": ..., "ar": ...} dicts; count them by vocabulary key.
+            violation_type = row["_id"].get("type")
+            type_key = term_key(violation_type)
+            if type_key:
+                entry["types"][type_key] += row["count"]
+                label = term_label({"labels": term_labels(violation_type)}, "en") or type_key
+                entry["labels"][(type_key, label)] += row["count"]
+    clusters = []
+    for (x, y), entry in cells.items():
+        if not entry["count"]:
+            continue
+        # The most frequent spelling of each type is its display label, as in the vocabulary.
+        labels = {}
+        for (type_key, label), _ in entry["labels"].most_common():
+            labels.setdefault(type_key, label)
+        clusters.append({
+            "coordinates": [entry["lng"] / entry["count"], entry["lat"] / entry["count"]],
+            "count": entry["count"],
+            "bounds": [x * cell - 180, y * cell - 90, (x + 1) * cell - 180, (y + 1) * cell - 90],
+            "violation_types": [
+                {"violation_type": labels[key], "count": n} for key, n in entry["types"].most_common(TOP_VIOLATION_TYPES)
+            ],
+            "sources": dict(entry["sources"]),
+        })
+    clusters.sort(key=lambda c: c["count"], reverse=True)
+    return clusters
@@ -0,0 +1,131 @@
+import asyncio
+import os
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from fastapi import UploadFile
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from uploads import UPLOAD_EXECUTOR, _remove_files, save_uploads
+
+STORE_DIRECTORY = "uploads/store"
+STAGING_DIRECTORY = "uploads/staging"
+THUMBNAIL_DIRECTORY = "uploads/thumbnails"
+os.makedirs(STAGING_DIRECTORY, exist_ok=True)
+# How long store_file waits between checks while release() finishes deleting the same blob.
+TOMBSTONE_RETRY_SECONDS = 0.05
+
+
+def blob_path(sha256: str) -> str:
+    return f"{STORE_DIRECTORY}/{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+
+def thumbnail_path(sha256: str) -> str:
+    return f"{THUMBNAIL_DIRECTORY}/{sha256[:2]}/{sha256}.jpg"
+
+
+def _move_into_store(staged_path: str, sha256: str) -> str:
+    final_path = blob_path(sha256)
+    os.makedirs(os.path.dirname(final_path), exist_ok=True)
+    # Identical content, so replacing an existing blob is harmless.
+    os.replace(staged_path, final_path)
+    return final_path
+
+
+def _remove_blob(sha256: str):
+    for path in (blob_path(sha256), thumbnail_path(sha256)):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+async def store_file(db: Any, staged_path: str, sha256: str, size: int, mimetype: str, references: int = 1) -> str:
+    """Move a hashed staging file into the store and take `references` on its blob."""
+    while True:
+        try:
+            # A blob claimed by release() is not revived; the upsert collides with its
+            # tombstone until the files are gone, and then starts a fresh blob.
+            await db["evidence_blobs"].update_one(
+                {"_id": sha256, "deleting": {"$ne": True}},
+                {
+                    "$inc": {"ref_count": references},
+                    "$setOnInsert": {
+                        "size": size,
+                        "mimetype": mimetype,
+                        "path": blob_path(sha256),
+                        "created_at": datetime.utcnow(),
+                    },
+                },
+                upsert=True
+            )
+            break
+        except DuplicateKeyError:
+            await asyncio.sleep(TOMBSTONE_RETRY_SECONDS)
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(UPLOAD_EXECUTOR, _move_into_store, staged_path, sha256)
+    except BaseException:
+        # The file never reached the store, so the references just taken must not outlive this call.
+        await release(db, [{"sha256": sha256}] * references)
+        raise
+
+
+async def store_uploads(db: Any, files: Optional[List[UploadFile]]) -> List[Dict[str, Any]]:
+    """Save uploads into the content-addressed store, reusing blobs that already exist.
+
+    Each returned dict is ready for an Attachment and references the blob by sha256.
+    Callers that fail to save the referencing document must release() the result.
+    """
+    staged = await save_uploads(files, STAGING_DIRECTORY)
+    stored = []
+    try:
+        for saved in staged:
+            staged_path = saved["filepath"]
+            saved["filepath"] = await store_file(db, staged_path, saved["sha256"], saved["size"], saved["mimetype"])
+            stored.append(saved)
+    except BaseException:
+        # Give back the blobs already referenced and drop the staged files that were never moved.
+        await release(db, stored)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(UPLOAD_EXECUTOR, _remove_files, [saved["filepath"] for saved in staged[len(stored):]])
+        raise
+    return stored
+
+
+def _hashes(attachments: Optional[Iterable[Any]]) -> Counter:
+    return Counter(
+        item["sha256"] for item in attachments or []
+        if isinstance(item, dict) and item.get("sha256")
+    )
+
+
+async def release(db: Any, attachments: Optional[Iterable[Any]]):
+    loop = asyncio.get_running_loop()
+    for sha256, count in _hashes(attachments).items():
+        blob = await db["evidence_blobs"].find_one_and_update(
+            {"_id": sha256},
+            {"$inc": {"ref_count": -count}},
+            return_document=ReturnDocument.AFTER
+        )
+        if not blob or blob.get("ref_count", 0) > 0:
+            continue
+        # Claim the blob with a tombstone so store_file waits instead of reusing files
+        # that are about to be removed; only then is it safe to delete them.
+        claimed = await db["evidence_blobs"].find_one_and_update(
+            {"_id": sha256, "ref_count": {"$lte": 0}, "deleting": {"$ne": True}},
+            {"$set": {"deleting": True}}
+        )
+        if not claimed:
+            continue
+        try:
+            await loop.run_in_executor(UPLOAD_EXECUTOR, _remove_blob, sha256)
+        finally:
+            await db["evidence_blobs"].delete_one({"_id": sha256, "deleting": True})
+
+
+async def adjust_references(db: Any, old_attachments: Optional[Iterable[Any]], new_attachments: Optional[Iterable[Any]]):
+    old, new = _hashes(old_attachments), _hashes(new_attachments)
+    for sha256, count in (new - old).items():
+        await db["evidence_blobs"].update_one({"_id": sha256, "deleting": {"$ne": True}}, {"$inc": {"ref_count": count}})
+    await release(db, [{"sha256": sha256} for sha256 in (old - new).elements()])
@@ -0,0 +1,106 @@
+import json
+from typing import Any, Dict, List, Optional
+
+# Indexed GeoJSON Point ([lng, lat]) kept next to the display location of cases and reports.
+GEO_FIELD = "geo"
+EARTH_RADIUS_METERS = 6378100
+MAX_RADIUS_METERS = 2_000_000
+
+
+def make_point(lng: Any, lat: Any) -> Dict[str, Any]:
+    lng, lat = float(lng), float(lat)
+    if not -180 <= lng <= 180 or not -90 <= lat <= 90:
+        raise ValueError("Coordinates must be longitude in [-180, 180] and latitude in [-90, 90].")
+    return {"type": "Point", "coordinates": [lng, lat]}
+
+
+def geo_point(point: Any) -> Optional[Dict[str, Any]]:
+    """Return the indexable form of a stored GeoJSON Point, or None for missing and [0, 0] placeholders."""
+    if not isinstance(point, dict) or point.get("type") != "Point":
+        return None
+    coordinates = point.get("coordinates")
+    if not isinstance(coordinates, (list, tuple)) or len(coordinates) != 2 or None in coordinates:
+        return None
+    try:
+        indexed = make_point(*coordinates)
+    except (TypeError, ValueError):
+        return None
+    return indexed if indexed["coordinates"] != [0.0, 0.0] else None
+
+
+def _parse_numbers(value: str, count: int, name: str) -> List[float]:
+    try:
+        numbers = [float(part) for part in value.split(",")]
+    except ValueError:
+        numbers = []
+    if len(numbers) != count:
+        raise ValueError(f"{name} must be {count} comma-separated numbers.")
+    return numbers
+
+
+def _polygon(ring: Any) -> Dict[str, Any]:
+    if isinstance(ring, dict):
+        if ring.get("type") != "Polygon" or not ring.get("coordinates"):
+            raise ValueError("polygon must be a GeoJSON Polygon or a list of [lng, lat] pairs.")
+        ring = ring["coordinates"][0]
+    if not isinstance(ring, list) or len(ring) < 3:
+        raise ValueError("polygon needs at least three [lng, lat] pairs.")
+    points = [make_point(*pair)["coordinates"] for pair in ring]
+    if points[0] != points[-1]:
+        points.append(points[0])
+    if len(points) < 4:
+        raise ValueError("polygon needs at least three distinct [lng, lat] pairs.")
+    return {"type": "Polygon", "coordinates": [points]}
+
+
+def geo_filter(
+    bbox: Optional[str] = None,
+    near: Optional[str] = None,
+    radius: Optional[float] = None,
+    polygon: Optional[str] = None
+) -> Optional[Dict[str, Any]]:
+    """Build a $geoWithin condition on GEO_FIELD from bbox, near+radius or polygon parameters.
+
+    $geoWithin is used instead of $near so results keep the keyset sort and can be counted.
+    Raises ValueError for malformed input.
+    """
+    given = [name for name, value in (("bbox", bbox), ("near", near), ("polygon", polygon)) if value]
+    if len(given) > 1:
+        raise ValueError(f"Use only one of bbox, near or polygon (got {', '.join(given)}).")
+    if bbox:
+        min_lng, min_lat, max_lng, max_lat = _parse_numbers(bbox, 4, "bbox")
+        if min_lng >= max_lng or min_lat >= max_lat:
+            raise ValueError("bbox must be min_lng,min_lat,max_lng,max_lat.")
+        shape = _polygon([[min_lng, min_lat], [max_lng, min_lat], [max_lng, max_lat], [min_lng, max_lat]])
+        return {GEO_FIELD: {"$geoWithin": {"$geometry": shape}}}
+    if near:
+        lng, lat = make_point(*_parse_numbers(near, 2, "near"))["coordinates"]
+        if not radius or not 0 < radius <= MAX_RADIUS_METERS:
+            raise ValueError(f"near requires radius in meters between 0 and {MAX_RADIUS_METERS}.")
+        return {GEO_FIELD: {"$geoWithin": {"$centerSphere": [[lng, lat], radius / EARTH_RADIUS_METERS]}}}
+    if polygon:
+        try:
+            shape = json.loads(polygon)
+        except ValueError:
+            raise ValueError("polygon must be JSON.")
+        return {GEO_FIELD: {"$geoWithin": {"$geometry": _polygon(shape)}}}
+    if radius:
+        raise ValueError("radius is only valid together with near.")
+    return None
+
+
+async def backfill_geo_fields(db: Any):
+    # Reports written before the geo field stored their points as [lat, lng]; flip them while indexing.
+    cursor = db["reports"].find({GEO_FIELD: {"$exists": False}}, {"incident_details.location.coordinates": 1})
+    async for doc in cursor:
+        point = ((doc.get("incident_details") or {}).get("location") or {}).get("coordinates")
+        update = {GEO_FIELD: None}
+        if isinstance(point, dict) and isinstance(point.get("coordinates"), list) and len(point["coordinates"]) == 2:
+            point = {"type": "Point", "coordinates": list(reversed(point["coordinates"]))}
+            update["incident_details.location.coordinates"] = point
+            update[GEO_FIELD] = geo_point(point)
+        await db["reports"].update_one({"_id": doc["_id"]}, {"$set": update})
+    async for doc in db["cases"].find({GEO_FIELD: {"$exists": False}}, {"location": 1}):
+        location = doc.get("location") or {}
+        point = location.get("coordinates") or location.get("geolocation")
+        await db["cases"].update_one({"_id": doc["_id"]}, {"$set": {GEO_FIELD: geo_point(point)}})
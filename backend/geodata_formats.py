@@ -0,0 +1,118 @@
+import struct
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Union
+
+from fastapi.responses import Response, StreamingResponse
+
+from serialization import dumps
+
+GEODATA_FORMATS = ("json", "geojson", "binary")
+GEOJSON_MEDIA_TYPE = "application/geo+json"
+BINARY_MEDIA_TYPE = "application/vnd.prm.geodata"
+BINARY_MAGIC = b"PRMG"
+BINARY_VERSION = 1
+BINARY_CLUSTERED = 1
+BINARY_TRUNCATED = 2
+NO_VALUE = 0xFFFF
+
+
+def to_feature(item: Dict[str, Any]) -> Dict[str, Any]:
+    properties = {key: value for key, value in item.items() if key != "coordinates"}
+    return {"type": "Feature", "geometry": {"type": "Point", "coordinates": item["coordinates"]}, "properties": properties}
+
+
+async def _aiter(items: Iterable[Dict[str, Any]]) -> AsyncIterator[Dict[str, Any]]:
+    for item in items:
+        yield item
+
+
+async def _geojson_chunks(
+    items: AsyncIterator[Dict[str, Any]],
+    members: Dict[str, Any],
+    trailing: Optional[Callable[[], Dict[str, Any]]]
+) -> AsyncIterator[bytes]:
+    yield b'{"type":"FeatureCollection",' + dumps(members)[1:-1] + (b"," if members else b"") + b'"features":['
+    separator = b""
+    async for item in items:
+        yield separator + dumps(to_feature(item))
+        separator = b","
+    yield b"]"
+    for key, value in (trailing() if trailing else {}).items():
+        yield b"," + dumps(key) + b":" + dumps(value)
+    yield b"}"
+
+
+def geojson_response(
+    items: Union[AsyncIterator[Dict[str, Any]], Iterable[Dict[str, Any]]],
+    members: Dict[str, Any],
+    trailing: Optional[Callable[[], Dict[str, Any]]] = None
+) -> StreamingResponse:
+    """Stream a FeatureCollection as items arrive; trailing() adds members known only at the end."""
+    if not hasattr(items, "__aiter__"):
+        items = _aiter(items)
+    return StreamingResponse(_geojson_chunks(items, members, trailing), media_type=GEOJSON_MEDIA_TYPE)
+
+
+class _Dictionary:
+    def __init__(self):
+        self.index: Dict[str, int] = {}
+
+    def code(self, value: Any) -> int:
+        if not isinstance(value, str) or not value:
+            return NO_VALUE
+        if value not in self.index:
+            if len(self.index) >= NO_VALUE:
+                raise ValueError("Too many distinct values for the binary geodata format.")
+            self.index[value] = len(self.index)
+        return self.index[value]
+
+    def pack(self) -> bytes:
+        parts = [struct.pack("<H", len(self.index))]
+        for value in self.index:
+            encoded = value.encode("utf-8")[:NO_VALUE]
+            parts.append(struct.pack("<H", len(encoded)) + encoded)
+        return b"".join(parts)
+
+
+def encode_binary(items: List[Dict[str, Any]], clustered: bool, truncated: bool = False) -> bytes:
+    """Pack points or clusters into columns; see frontend/src/geodataFormat.js for the reader.
+
+    Layout, little-endian: magic, u8 version, u8 flags (BINARY_CLUSTERED | BINARY_TRUNCATED), u16 reserved,
+    u32 n; float32[2n] lng/lat pairs; u32[n] counts; u32[n + 1] offsets into the violation type column;
+    u16[n] source; u16[n] status; u16[] violation types; padding to 4 bytes; then the source, status and
+    violation type string tables (u16 count, then u16 length + UTF-8 per entry).
+    Dictionary codes index the tables; NO_VALUE marks a missing value. Clusters carry their dominant
+    source, no status and their top violation types.
+    """
+    sources, statuses, types = _Dictionary(), _Dictionary(), _Dictionary()
+    coordinates, counts, offsets, source_codes, status_codes, type_codes = [], [], [0], [], [], []
+    for item in items:
+        coordinates.extend(item["coordinates"][:2])
+        counts.append(item.get("count", 1))
+        if clustered:
+            source_codes.append(sources.code(max(item["sources"], key=item["sources"].get) if item.get("sources") else None))
+            status_codes.append(NO_VALUE)
+            names = [entry["violation_type"] for entry in item.get("violation_types") or []]
+        else:
+            source_codes.append(sources.code(item.get("source")))
+            status_codes.append(statuses.code(item.get("status")))
+            names = item.get("violation_types") or []
+        type_codes.extend(types.code(name) for name in names)
+        offsets.append(len(type_codes))
+    n = len(counts)
+    flags = (BINARY_CLUSTERED if clustered else 0) | (BINARY_TRUNCATED if truncated else 0)
+    body = b"".join([
+        BINARY_MAGIC,
+        struct.pack("<BBHI", BINARY_VERSION, flags, 0, n),
+        struct.pack(f"<{2 * n}f", *coordinates),
+        struct.pack(f"<{n}I", *counts),
+        struct.pack(f"<{n + 1}I", *offsets),
+        struct.pack(f"<{n}H", *source_codes),
+        struct.pack(f"<{n}H", *status_codes),
+        struct.pack(f"<{len(type_codes)}H", *type_codes),
+    ])
+    body += b"\0" * (-len(body) % 4)
+    return body + sources.pack() + statuses.pack() + types.pack()
+
+
+def binary_response(items: List[Dict[str, Any]], clustered: bool, truncated: bool = False) -> Response:
+    return Response(content=encode_binary(items, clustered, truncated), media_type=BINARY_MEDIA_TYPE)
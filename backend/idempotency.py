@@ -0,0 +1,106 @@
+import hashlib
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Iterable, Optional, Tuple
+
+from fastapi import HTTPException, Request
+from fastapi.responses import Response
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_COLLECTION = "idempotency_keys"
+IDEMPOTENCY_TTL = int(os.getenv("IDEMPOTENCY_TTL", 24 * 3600))
+MAX_KEY_LENGTH = 255
+# A request that has not finished after this long is presumed dead and its key may be reused.
+IN_PROGRESS_TIMEOUT = timedelta(minutes=5)
+
+
+async def request_fingerprint(request: Request) -> str:
+    """Hash of the submitted form; uploads count by name and size so the body is not read twice."""
+    form = await request.form()
+    parts = []
+    for name, value in sorted(form.multi_items(), key=lambda item: item[0]):
+        if hasattr(value, "filename"):
+            value = f"{value.filename}:{value.size}"
+        parts.append(f"{name}={value}")
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+def _key_id(scope: str, key: str) -> str:
+    return f"{scope}:{key}"
+
+
+async def replay_response(db: Any, request: Request, scope: str, key: Optional[str]) -> Optional[Response]:
+    """Claim an Idempotency-Key, or return the response stored for it by an earlier request.
+
+    Returns None when the caller should go ahead and must later call save_response or release_key.
+    """
+    if key is None:
+        return None
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail=f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters.")
+    fingerprint = await request_fingerprint(request)
+    now = datetime.utcnow()
+    try:
+        await db[IDEMPOTENCY_COLLECTION].insert_one({
+            "_id": _key_id(scope, key),
+            "fingerprint": fingerprint,
+            "status": "in_progress",
+            "created_at": now,
+        })
+        return None
+    except DuplicateKeyError:
+        existing = await db[IDEMPOTENCY_COLLECTION].find_one({"_id": _key_id(scope, key)})
+    if existing is None:
+        return await replay_response(db, request, scope, key)
+    if existing["fingerprint"] != fingerprint:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request.")
+    if existing["status"] == "in_progress":
+        taken_over = await db[IDEMPOTENCY_COLLECTION].update_one(
+            {"_id": existing["_id"], "status": "in_progress", "created_at": {"$lte": now - IN_PROGRESS_TIMEOUT}},
+            {"$set": {"created_at": now}}
+        )
+        if taken_over.modified_count:
+            return None
+        raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still being processed.")
+    return Response(
+        content=existing["body"],
+        status_code=existing["status_code"],
+        media_type=existing["media_type"],
+        headers={"Idempotent-Replayed": "true"}
+    )
+
+
+async def save_response(db: Any, scope: str, key: Optional[str], response: Response) -> Response:
+    if key is not None:
+        await db[IDEMPOTENCY_COLLECTION].update_one(
+            {"_id": _key_id(scope, key)},
+            {"$set": {
+                "status": "completed",
+                "status_code": response.status_code,
+                "media_type": response.media_type,
+                "body": bytes(response.body),
+                "created_at": datetime.utcnow(),
+            }}
+        )
+    return response
+
+
+async def release_key(db: Any, scope: str, key: Optional[str]):
+    """Forget a claimed key after a failed request so the client can retry it."""
+    if key is not None:
+        await db[IDEMPOTENCY_COLLECTION].delete_one({"_id": _key_id(scope, key), "status": "in_progress"})
+
+
+async def follow_up(steps: Iterable[Tuple[str, Awaitable]]):
+    """Run the bookkeeping after a committed write; a failed step is logged and never fails the request.
+
+    Once the document is stored its Idempotency-Key must not be released, or a retry would create it again.
+    """
+    for description, step in steps:
+        try:
+            await step
+        except Exception:
+            logger.exception("Failed to %s", description)
@@ -0,0 +1,70 @@
+import logging
+from typing import Any
+
+from pymongo.errors import DuplicateKeyError
+
+from change_feed import enable_pre_images
+from geo import GEO_FIELD, backfill_geo_fields
+from idempotency import IDEMPOTENCY_COLLECTION, IDEMPOTENCY_TTL
+from jobs import JOBS_COLLECTION
+from normalization import backfill_case_shadow_fields
+from rollups import ROLLUP_COLLECTION, create_rollup_indexes, ensure_rollups
+from status_history import STATUS_EVENTS, migrate_status_history
+from text_search import TEXT_INDEX_WEIGHTS, backfill_search_fields
+from vocabulary import VOCABULARY_COLLECTION, create_vocabulary_indexes, ensure_vocabulary
+
+logger = logging.getLogger(__name__)
+
+
+async def ensure_unique_index(collection: Any, field: str):
+    """Index a public ID as unique, replacing the non-unique index older deployments created.
+
+    Documents that already share an ID (from the old 8-digit format) keep a plain index until fixed.
+    """
+    name = f"{field}_1"
+    existing = (await collection.index_information()).get(name)
+    if existing and existing.get("unique"):
+        return
+    if existing:
+        await collection.drop_index(name)
+    try:
+        await collection.create_index(field, unique=True)
+    except DuplicateKeyError as e:
+        logger.error("Duplicate %s values in %s; keeping a non-unique index until they are resolved: %s", field, collection.name, e)
+        await collection.create_index(field)
+
+
+async def ensure_indexes(db: Any):
+    await db["cases"].create_index([("created_at", 1), ("_id", 1)])
+    await db["reports"].create_index([("created_at", 1), ("_id", 1)])
+    await db["reports"].create_index([("related_case_id", 1), ("created_at", -1), ("_id", -1)])
+    await ensure_unique_index(db["cases"], "case_id")
+    await ensure_unique_index(db["reports"], "report_id")
+    await db["cases"].create_index([("normalized.country", 1), ("normalized.region", 1), ("created_at", 1)])
+    await db["cases"].create_index([("normalized.status", 1), ("normalized.priority", 1), ("created_at", 1)])
+    await db["cases"].create_index([("normalized.violation_types", 1), ("created_at", 1)])
+    await db["cases"].create_index([("normalized.case_type", 1), ("created_at", 1)])
+    await db[JOBS_COLLECTION].create_index([("status", 1), ("run_after", 1)])
+    await db[JOBS_COLLECTION].create_index(
+        "finished_at", expireAfterSeconds=7 * 24 * 3600, partialFilterExpression={"status": "done"}
+    )
+    await create_vocabulary_indexes(db[VOCABULARY_COLLECTION])
+    await create_rollup_indexes(db[ROLLUP_COLLECTION])
+    await db[STATUS_EVENTS].create_index([("entity", 1), ("entity_id", 1), ("change_date", -1), ("_id", -1)])
+    await db[IDEMPOTENCY_COLLECTION].create_index("created_at", expireAfterSeconds=IDEMPOTENCY_TTL)
+    for collection in ("cases", "reports"):
+        await db[collection].create_index([(GEO_FIELD, "2dsphere")])
+        await db[collection].create_index(
+            [("search.title", "text"), ("search.body", "text")],
+            name="search_text",
+            weights=TEXT_INDEX_WEIGHTS,
+            default_language="none",
+            language_override="search_language"
+        )
+    await enable_pre_images(db)
+    await backfill_case_shadow_fields(db)
+    await backfill_search_fields(db)
+    await backfill_geo_fields(db)
+    await ensure_vocabulary(db)
+    await ensure_rollups(db)
+    await migrate_status_history(db)
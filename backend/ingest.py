@@ -0,0 +1,88 @@
+import csv
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+ROW_FORMATS = ("ndjson", "csv")
+
+
+def decode_line(line: bytes) -> Tuple[str, Optional[UnicodeDecodeError]]:
+    """Decode one line as UTF-8; invalid bytes become U+FFFD and the error is returned alongside."""
+    try:
+        return line.decode("utf-8-sig").rstrip("\r"), None
+    except UnicodeDecodeError as e:
+        return line.decode("utf-8-sig", errors="replace").rstrip("\r"), e
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line
+    if buffer:
+        yield buffer
+
+
+async def iter_rows(chunks: AsyncIterator[bytes], row_format: str) -> AsyncIterator[Tuple[int, Any]]:
+    """Yield (row_number, row) from an NDJSON or CSV byte stream.
+
+    A row is a parsed dict, or an Exception describing why that line could not be parsed.
+    CSV rows are dicts keyed by the header line; quoted fields may span lines.
+    A line that is not valid UTF-8 fails only the row it belongs to.
+    """
+    header: Optional[List[str]] = None
+    pending = ""
+    pending_error: Optional[Exception] = None
+    row_number = 0
+    async for raw_line in iter_lines(chunks):
+        line, decode_error = decode_line(raw_line)
+        if row_format == "ndjson":
+            if not line.strip():
+                continue
+            row_number += 1
+            if decode_error:
+                yield row_number, decode_error
+                continue
+            try:
+                row = json.loads(line)
+                if not isinstance(row, dict):
+                    raise ValueError("Each NDJSON line must be a JSON object")
+                yield row_number, row
+            except ValueError as e:
+                yield row_number, e
+            continue
+
+        # The replaced text still keeps quote counting in step, so a bad line spoils only its own record.
+        pending = f"{pending}\n{line}" if pending else line
+        pending_error = pending_error or decode_error
+        if pending.count('"') % 2:
+            continue
+        record, pending = pending, ""
+        record_error, pending_error = pending_error, None
+        if not record.strip():
+            continue
+        values = next(csv.reader([record]))
+        if header is None:
+            # Columns with undecodable names simply match no field.
+            header = [name.strip() for name in values]
+            continue
+        row_number += 1
+        if record_error:
+            yield row_number, record_error
+            continue
+        if len(values) != len(header):
+            yield row_number, ValueError(f"Expected {len(header)} columns, got {len(values)}")
+            continue
+        yield row_number, {key: value for key, value in zip(header, values) if value != ""}
+    if pending:
+        yield row_number + 1, ValueError("Unterminated quoted field at end of input")
+
+
+def error_details(error: Exception) -> List[Dict[str, Any]]:
+    if hasattr(error, "errors"):
+        return [
+            {"field": ".".join(str(part) for part in item.get("loc", ())), "message": item.get("msg")}
+            for item in error.errors()
+        ]
+    return [{"field": None, "message": str(error)}]
@@ -0,0 +1,136 @@
+import asyncio
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+JOBS_COLLECTION = "jobs"
+# Concurrent jobs run inside the API process; with 0, run `python -m worker` to drain the queue.
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))
+# Concurrent jobs run by a standalone `python -m worker` process.
+WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", 2))
+JOB_PROCESSES = int(os.getenv("JOB_PROCESSES", os.cpu_count() or 2))
+MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 5))
+RETRY_BASE_SECONDS = 10
+LOCK_TIMEOUT = timedelta(minutes=10)
+POLL_INTERVAL = 5
+
+Handler = Callable[[Any, Dict[str, Any]], Awaitable[None]]
+FailureHandler = Callable[[Any, Dict[str, Any], str], Awaitable[None]]
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_wakeup = asyncio.Event()
+
+
+async def run_in_process(fn: Callable, *args: Any) -> Any:
+    """Run CPU-heavy, picklable work in the shared process pool."""
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=JOB_PROCESSES)
+    return await asyncio.get_running_loop().run_in_executor(_process_pool, fn, *args)
+
+
+async def enqueue(db: Any, kind: str, payload: Dict[str, Any]) -> Any:
+    now = datetime.utcnow()
+    result = await db[JOBS_COLLECTION].insert_one({
+        "kind": kind,
+        "payload": payload,
+        "status": "queued",
+        "attempts": 0,
+        "run_after": now,
+        "created_at": now,
+    })
+    _wakeup.set()
+    return result.inserted_id
+
+
+async def claim_job(db: Any) -> Optional[Dict[str, Any]]:
+    """Lock the next due job; jobs whose worker died are picked up again once their lock expires."""
+    now = datetime.utcnow()
+    return await db[JOBS_COLLECTION].find_one_and_update(
+        {"$or": [
+            {"status": "queued", "run_after": {"$lte": now}},
+            {"status": "running", "locked_until": {"$lte": now}},
+        ]},
+        {"$set": {"status": "running", "started_at": now, "locked_until": now + LOCK_TIMEOUT}, "$inc": {"attempts": 1}},
+        sort=[("run_after", 1)],
+        return_document=ReturnDocument.AFTER
+    )
+
+
+class JobWorker:
+    def __init__(
+        self,
+        handlers: Dict[str, Handler],
+        on_failure: Optional[Dict[str, FailureHandler]] = None,
+        concurrency: int = JOB_WORKERS
+    ):
+        self.handlers = handlers
+        self.on_failure = on_failure or {}
+        self.concurrency = concurrency
+        self._tasks = []
+
+    def start(self, db: Any):
+        self._tasks = [asyncio.create_task(self._run(db)) for _ in range(self.concurrency)]
+
+    async def stop(self):
+        global _process_pool
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=False, cancel_futures=True)
+            _process_pool = None
+
+    async def _run(self, db: Any):
+        while True:
+            try:
+                job = await claim_job(db)
+            except Exception as e:
+                logger.error("Failed to claim job: %s", e)
+                job = None
+            if job is None:
+                _wakeup.clear()
+                try:
+                    await asyncio.wait_for(_wakeup.wait(), POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self.execute(db, job)
+
+    async def execute(self, db: Any, job: Dict[str, Any]):
+        kind = job["kind"]
+        try:
+            handler = self.handlers.get(kind)
+            if handler is None:
+                raise LookupError(f"No handler registered for job kind '{kind}'")
+            await handler(db, job["payload"])
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            now = datetime.utcnow()
+            if job["attempts"] >= MAX_ATTEMPTS:
+                logger.error("Job %s (%s) failed after %s attempts: %s", job["_id"], kind, job["attempts"], error)
+                await db[JOBS_COLLECTION].update_one(
+                    {"_id": job["_id"]},
+                    {"$set": {"status": "failed", "error": error, "finished_at": now}}
+                )
+                if kind in self.on_failure:
+                    await self.on_failure[kind](db, job["payload"], error)
+            else:
+                delay = RETRY_BASE_SECONDS * 2 ** (job["attempts"] - 1)
+                logger.warning("Job %s (%s) attempt %s failed, retrying in %ss: %s", job["_id"], kind, job["attempts"], delay, error)
+                await db[JOBS_COLLECTION].update_one(
+                    {"_id": job["_id"]},
+                    {"$set": {"status": "queued", "error": error, "run_after": now + timedelta(seconds=delay)}}
+                )
+            return
+        await db[JOBS_COLLECTION].update_one(
+            {"_id": job["_id"]},
+            {"$set": {"status": "done", "finished_at": datetime.utcnow()}, "$unset": {"error": ""}}
+        )
@@ -0,0 +1,57 @@
+from typing import Any, Dict, List
+
+from pagination import KEYSET_SORT
+
+MAX_LINKED_CASES = 100
+
+
+def _keep(projection: Dict[str, Any], field: str) -> Dict[str, Any]:
+    # Exclusion projections already keep every other field; inclusion ones need it listed.
+    if any(value == 1 for key, value in projection.items() if key != "_id"):
+        return {**projection, field: 1}
+    return projection
+
+
+def linked_reports_pipeline(
+    case_ids: List[str],
+    case_projection: Dict[str, Any],
+    report_projection: Dict[str, Any],
+    limit: int
+) -> List[Dict[str, Any]]:
+    """Cases matching case_ids, each with its newest linked reports under `linked_reports`."""
+    return [
+        {"$match": {"case_id": {"$in": case_ids}}},
+        {"$lookup": {
+            "from": "reports",
+            "localField": "case_id",
+            "foreignField": "related_case_id",
+            "pipeline": [
+                {"$sort": {key: -direction for key, direction in KEYSET_SORT}},
+                {"$limit": limit},
+                {"$project": report_projection},
+            ],
+            "as": "linked_reports",
+        }},
+        {"$project": _keep(case_projection, "linked_reports")},
+    ]
+
+
+def report_case_pipeline(
+    report_id: str,
+    report_projection: Dict[str, Any],
+    case_projection: Dict[str, Any]
+) -> List[Dict[str, Any]]:
+    """The report with its related case (or null) under `related_case`."""
+    return [
+        {"$match": {"report_id": report_id}},
+        {"$limit": 1},
+        {"$lookup": {
+            "from": "cases",
+            "localField": "related_case_id",
+            "foreignField": "case_id",
+            "pipeline": [{"$limit": 1}, {"$project": case_projection}],
+            "as": "related_case",
+        }},
+        {"$set": {"related_case": {"$first": "$related_case"}}},
+        {"$project": _keep(report_projection, "related_case")},
+    ]
@@ -0,0 +1,65 @@
+import logging
+import os
+import random
+import sys
+import uuid
+from contextvars import ContextVar
+from typing import Optional
+
+from serialization import dumps
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# "json" emits one object per line for log shippers; "text" is the human-readable default.
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+# Fraction of requests whose INFO/DEBUG records are kept. Warnings and errors are always kept.
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", 1.0))
+
+request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+request_sampled: ContextVar[bool] = ContextVar("request_sampled", default=True)
+
+# Attributes every LogRecord has; anything else was passed through `extra=`.
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "request_id"}
+
+
+def start_request(incoming_id: Optional[str] = None) -> str:
+    """Bind a correlation id and sampling decision to the current request context."""
+    # Client-supplied ids are echoed into logs, so only short printable tokens are accepted.
+    rid = incoming_id if incoming_id and len(incoming_id) <= 128 and incoming_id.isprintable() else uuid.uuid4().hex
+    request_id.set(rid)
+    request_sampled.set(LOG_SAMPLE_RATE >= 1 or random.random() < LOG_SAMPLE_RATE)
+    return rid
+
+
+class RequestContextFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id.get()
+        return record.levelno >= logging.WARNING or request_sampled.get()
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return dumps(entry).decode("utf-8")
+
+
+def configure_logging():
+    handler = logging.StreamHandler(sys.stdout)
+    handler.addFilter(RequestContextFilter())
+    if LOG_FORMAT == "json":
+        handler.setFormatter(JSONFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - [%(request_id)s] %(name)s - %(message)s"))
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(LOG_LEVEL)
@@ -1,4 +1,5 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Request, status
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordRequestForm
 from passlib.context import CryptContext
@@ -6,14 +7,24 @@ from jose import jwt
 from datetime import datetime, timedelta
 import os
 
-from dependencies import get_db
+from auth import ALGORITHM, SECRET_KEY
+from dependencies import get_db, db_instance
+from indexes import ensure_indexes
+from uploads import MAX_REQUEST_SIZE
+from logging_config import configure_logging, start_request
+from jobs import JobWorker
+from media import JOB_FAILURE_HANDLERS, JOB_HANDLERS
 from routers import victims, cases, reports
 from routers import analytics
+from routers import search
+from routers import evidence
+from routers import vocabulary
+from routers import changes
 
-SECRET_KEY = "your_secret_key"
-ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
+configure_logging()
+
 app = FastAPI(
     title="Human Rights Monitor API",
     description="API for managing human rights incidents, cases, and individuals.",
@@ -28,6 +39,36 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+STREAMED_UPLOAD_PATHS = {"/reports/bulk"}
+
+@app.middleware("http")
+async def limit_request_size(request: Request, call_next):
+    content_length = request.headers.get("content-length")
+    # Bulk imports are consumed as a stream, so their size is not bounded by the upload limit.
+    if request.url.path in STREAMED_UPLOAD_PATHS:
+        return await call_next(request)
+    if content_length and content_length.isdigit() and int(content_length) > MAX_REQUEST_SIZE:
+        return JSONResponse(status_code=413, content={"detail": f"Request body exceeds the {MAX_REQUEST_SIZE} byte limit"})
+    return await call_next(request)
+
+@app.middleware("http")
+async def bind_request_id(request: Request, call_next):
+    rid = start_request(request.headers.get("x-request-id"))
+    response = await call_next(request)
+    response.headers["X-Request-ID"] = rid
+    return response
+
+job_worker = JobWorker(JOB_HANDLERS, on_failure=JOB_FAILURE_HANDLERS)
+
+@app.on_event("startup")
+async def create_indexes():
+    await ensure_indexes(db_instance)
+    job_worker.start(db_instance)
+
+@app.on_event("shutdown")
+async def stop_workers():
+    await job_worker.stop()
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 import motor.motor_asyncio
@@ -68,6 +109,10 @@ app.include_router(cases.router)
 app.include_router(reports.router)
 app.include_router(victims.router)
 app.include_router(analytics.router)
+app.include_router(search.router)
+app.include_router(evidence.router)
+app.include_router(vocabulary.router)
+app.include_router(changes.router)
 
 @app.get("/")
 async def root():
@@ -0,0 +1,126 @@
+import hashlib
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+
+from evidence_store import STAGING_DIRECTORY, release, store_file, thumbnail_path
+from jobs import enqueue, run_in_process
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+EVIDENCE_JOB = "evidence"
+THUMBNAIL_SIZE = (320, 320)
+GPS_INFO_TAG = 0x8825
+
+# Where each source keeps its attachments and the field identifying a document.
+EVIDENCE_ARRAYS = {"cases": ("case_id", "attachments"), "reports": ("report_id", "evidence")}
+
+
+def _file_digest(path: str) -> Dict[str, Any]:
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha256.update(chunk)
+    return {"sha256": sha256.hexdigest(), "size": os.path.getsize(path)}
+
+
+def process_image(path: str, sha256: str, stripped_path: Optional[str]) -> Dict[str, Any]:
+    """Extract metadata, write a thumbnail and optionally a copy without EXIF. Runs in a worker process."""
+    result = {"metadata": {}, "stripped": None}
+    with Image.open(path) as image:
+        exif = image.getexif()
+        result["metadata"] = {
+            "format": image.format,
+            "width": image.width,
+            "height": image.height,
+            "has_exif": bool(exif),
+            "has_gps": GPS_INFO_TAG in exif,
+        }
+        upright = ImageOps.exif_transpose(image)
+        if stripped_path and exif:
+            # Pillow only writes EXIF when asked to, so re-saving drops it (GPS included).
+            options = {"quality": 95} if image.format == "JPEG" else {}
+            upright.save(stripped_path, format=image.format, **options)
+            result["stripped"] = _file_digest(stripped_path)
+            sha256 = result["stripped"]["sha256"]
+        thumbnail = upright.convert("RGB")
+        thumbnail.thumbnail(THUMBNAIL_SIZE)
+        target = thumbnail_path(sha256)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        thumbnail.save(target, "JPEG", quality=80)
+    result["thumbnail"] = target
+    return result
+
+
+async def enqueue_evidence(db: Any, source: str, doc_id: str, attachments: List[Dict[str, Any]], strip_metadata: bool = False):
+    for sha256 in dict.fromkeys(item["sha256"] for item in attachments if item.get("sha256")):
+        await enqueue(db, EVIDENCE_JOB, {"source": source, "id": doc_id, "sha256": sha256, "strip_metadata": strip_metadata})
+
+
+async def set_processing(db: Any, payload: Dict[str, Any], processing: Dict[str, Any], replacement: Optional[Dict[str, Any]] = None):
+    id_field, array = EVIDENCE_ARRAYS[payload["source"]]
+    fields = {f"{array}.$[item].processing": processing}
+    for key, value in (replacement or {}).items():
+        fields[f"{array}.$[item].{key}"] = value
+    await db[payload["source"]].update_one(
+        {id_field: payload["id"]},
+        {"$set": fields},
+        array_filters=[{"item.sha256": payload["sha256"]}]
+    )
+
+
+async def process_evidence_job(db: Any, payload: Dict[str, Any]):
+    sha256 = payload["sha256"]
+    blob = await db["evidence_blobs"].find_one({"_id": sha256, "deleting": {"$ne": True}})
+    if not blob:
+        return
+    if Image is None or not (blob.get("mimetype") or "").startswith("image/"):
+        await set_processing(db, payload, {"status": "skipped", "processed_at": datetime.utcnow()})
+        return
+    if blob.get("processing") and not payload["strip_metadata"]:
+        # Same content was processed for another attachment already.
+        await set_processing(db, payload, blob["processing"])
+        return
+
+    stripped_path = f"{STAGING_DIRECTORY}/{ObjectId()}" if payload["strip_metadata"] else None
+    result = await run_in_process(process_image, blob["path"], sha256, stripped_path)
+    processing = {
+        "status": "done",
+        "metadata": result["metadata"],
+        "thumbnail": result["thumbnail"],
+        "processed_at": datetime.utcnow(),
+    }
+    if not result["stripped"]:
+        await db["evidence_blobs"].update_one({"_id": sha256}, {"$set": {"processing": processing}})
+        await set_processing(db, payload, processing)
+        return
+
+    # Swap the attachments over to the stripped copy, then drop their references to the original.
+    id_field, array = EVIDENCE_ARRAYS[payload["source"]]
+    doc = await db[payload["source"]].find_one({id_field: payload["id"]}, {array: 1})
+    references = sum(1 for item in (doc or {}).get(array) or [] if item.get("sha256") == sha256)
+    if not references:
+        os.remove(stripped_path)
+        return
+    stripped = result["stripped"]
+    processing["metadata"].update(has_exif=False, has_gps=False, stripped_from=sha256)
+    filepath = await store_file(db, stripped_path, stripped["sha256"], stripped["size"], blob["mimetype"], references)
+    try:
+        await set_processing(db, payload, processing, {"sha256": stripped["sha256"], "filepath": filepath, "size": stripped["size"]})
+    except Exception:
+        await release(db, [{"sha256": stripped["sha256"]}] * references)
+        raise
+    await release(db, [{"sha256": sha256}] * references)
+
+
+async def mark_evidence_failed(db: Any, payload: Dict[str, Any], error: str):
+    await set_processing(db, payload, {"status": "failed", "error": error, "processed_at": datetime.utcnow()})
+
+
+JOB_HANDLERS = {EVIDENCE_JOB: process_evidence_job}
+JOB_FAILURE_HANDLERS = {EVIDENCE_JOB: mark_evidence_failed}
@@ -0,0 +1,73 @@
+import re
+from typing import Any, Dict, List, Optional
+
+MATCH_MODES = ("exact", "prefix", "contains")
+
+CASE_FILTER_FIELDS = {
+    "country": "location.country",
+    "region": "location.region",
+    "violation_types": "violation_types",
+    "status": "status",
+    "priority": "priority",
+    "case_type": "case_type",
+}
+
+
+def normalize(value: Any) -> Optional[str]:
+    if isinstance(value, dict):
+        value = value.get("en") or next(iter(value.values()), None)
+    if not isinstance(value, str):
+        return None
+    value = " ".join(value.split()).lower()
+    return value or None
+
+
+def normalize_list(values: Any) -> List[str]:
+    normalized = []
+    for value in values or []:
+        if isinstance(value, dict):
+            candidates = [normalize(v) for v in value.values()]
+        else:
+            candidates = [normalize(value)]
+        for candidate in candidates:
+            if candidate and candidate not in normalized:
+                normalized.append(candidate)
+    return normalized
+
+
+def case_shadow_fields(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Return `$set`-ready normalized.* values for the case fields present in `data`."""
+    shadow = {}
+    location = data.get("location")
+    if isinstance(location, dict):
+        shadow["normalized.country"] = normalize(location.get("country"))
+        shadow["normalized.region"] = normalize(location.get("region"))
+    if "violation_types" in data:
+        shadow["normalized.violation_types"] = normalize_list(data["violation_types"])
+    for key in ("status", "priority", "case_type"):
+        if key in data:
+            shadow[f"normalized.{key}"] = normalize(data[key])
+    return shadow
+
+
+def nest_shadow_fields(shadow: Dict[str, Any]) -> Dict[str, Any]:
+    return {key.split(".", 1)[1]: value for key, value in shadow.items()}
+
+
+def build_match(key: str, value: str, mode: str) -> Dict[str, Any]:
+    if mode == "contains":
+        return {CASE_FILTER_FIELDS[key]: {"$regex": re.escape(value), "$options": "i"}}
+    normalized = normalize(value) or ""
+    if mode == "prefix":
+        return {f"normalized.{key}": {"$regex": f"^{re.escape(normalized)}"}}
+    return {f"normalized.{key}": normalized}
+
+
+async def backfill_case_shadow_fields(db: Any):
+    cursor = db["cases"].find(
+        {"normalized": {"$exists": False}},
+        {"location": 1, "violation_types": 1, "status": 1, "priority": 1, "case_type": 1}
+    )
+    async for doc in cursor:
+        shadow = case_shadow_fields({**{k: None for k in ("status", "priority", "case_type")}, **doc})
+        await db["cases"].update_one({"_id": doc["_id"]}, {"$set": {"normalized": nest_shadow_fields(shadow)}})
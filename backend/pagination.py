@@ -0,0 +1,63 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException
+
+KEYSET_SORT = [("created_at", 1), ("_id", 1)]
+
+
+def encode_cursor(doc: Dict[str, Any], field: str = "created_at") -> str:
+    value = doc.get(field)
+    payload = {
+        "created_at": value.isoformat() if isinstance(value, datetime) else None,
+        "id": str(doc["_id"]),
+    }
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Dict[str, Any]:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        created_at = payload.get("created_at")
+        return {
+            "created_at": datetime.fromisoformat(created_at) if created_at else None,
+            "_id": ObjectId(payload["id"]),
+        }
+    except (ValueError, KeyError, TypeError, InvalidId):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+
+def keyset_filter(token: Optional[str], field: str = "created_at", descending: bool = False) -> Dict[str, Any]:
+    """Filter continuing a (field, _id) sort after the document encoded in token."""
+    if not token:
+        return {}
+    position = decode_cursor(token)
+    after = "$lt" if descending else "$gt"
+    if position["created_at"] is None:
+        if descending:
+            return {field: None, "_id": {after: position["_id"]}}
+        # Documents without the field sort first; continue among them by _id, then into dated ones.
+        return {"$or": [
+            {field: None, "_id": {after: position["_id"]}},
+            {field: {"$ne": None}},
+        ]}
+    later = [{field: {after: position["created_at"]}}]
+    if descending:
+        later.append({field: None})
+    return {"$or": [
+        *later,
+        {field: position["created_at"], "_id": {after: position["_id"]}},
+    ]}
+
+
+def merge_filters(query: Dict[str, Any], extra: Dict[str, Any]) -> Dict[str, Any]:
+    if not extra:
+        return query
+    if not query:
+        return extra
+    return {"$and": [query, extra]}
@@ -0,0 +1,57 @@
+import re
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException
+
+FIELD_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$")
+
+# Internal shadow fields that are never returned to clients.
+HIDDEN_FIELDS = {"normalized": 0, "search": 0, "geo": 0}
+
+VIEWS = {
+    "cases": {
+        "summary": [
+            "case_id", "title", "status", "priority", "case_type", "violation_types",
+            "location.country", "location.region", "date_occurred", "created_at",
+        ],
+    },
+    "reports": {
+        "summary": [
+            "report_id", "title", "status", "priority", "reporter_type", "related_case_id",
+            "incident_details.date", "incident_details.violation_types",
+            "incident_details.location.country", "incident_details.location.region",
+            "incident_details.location.city", "incident_details.location.address", "created_at",
+        ],
+    },
+}
+
+ID_FIELDS = {"cases": "case_id", "reports": "report_id"}
+
+
+def build_projection(
+    collection: str,
+    fields: Optional[str] = None,
+    view: str = "full",
+    required: tuple = ()
+) -> Dict[str, Any]:
+    if fields:
+        names = [f.strip() for f in fields.split(",") if f.strip()]
+        invalid = [name for name in names if not FIELD_RE.match(name) or name.split(".")[0] in HIDDEN_FIELDS]
+        if invalid:
+            raise HTTPException(status_code=400, detail=f"Invalid field name(s): {', '.join(invalid)}")
+    elif view == "full":
+        return dict(HIDDEN_FIELDS)
+    elif view in VIEWS[collection]:
+        names = VIEWS[collection][view]
+    else:
+        available = ", ".join(["full", *VIEWS[collection]])
+        raise HTTPException(status_code=400, detail=f"Unknown view '{view}'. Use one of: {available}.")
+
+    projection = {ID_FIELDS[collection]: 1}
+    for name in [*names, *required]:
+        if any(name.startswith(f"{other}.") for other in projection):
+            continue
+        for other in [p for p in projection if p.startswith(f"{name}.")]:
+            del projection[other]
+        projection[name] = 1
+    return projection
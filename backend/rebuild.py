@@ -0,0 +1,22 @@
+from typing import Any, Awaitable, Callable, Dict, List
+
+REBUILD_SUFFIX = "_rebuild"
+
+
+async def replace_collection(
+    db: Any,
+    name: str,
+    documents: List[Dict[str, Any]],
+    create_indexes: Callable[[Any], Awaitable[None]]
+):
+    """Swap a freshly built collection in for `name` in one rename.
+
+    Readers see either the old or the new contents, never an empty collection mid-rebuild.
+    create_indexes(collection) is applied to the new collection before it goes live.
+    """
+    staging = db[name + REBUILD_SUFFIX]
+    await staging.drop()
+    await create_indexes(staging)
+    if documents:
+        await staging.insert_many(documents)
+    await staging.rename(name, dropTarget=True)
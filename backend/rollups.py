@@ -0,0 +1,128 @@
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from pymongo import UpdateOne
+
+from analytics_queries import ANALYTICS_SOURCES
+from cache import analytics_cache
+from rebuild import replace_collection
+
+ROLLUP_COLLECTION = "analytics_rollups"
+ROLLUP_KEY = ("source", "day", "country", "region", "violation_type")
+ROLLUP_PATHS = ("date", "country", "region", "violation_types")
+# Week numbers follow $dateToString's %W, as the per-document timeline did.
+TIME_FORMATS = {
+    "day": "%Y-%m-%d",
+    "week": "%Y-%W",
+    "month": "%Y-%m",
+    "year": "%Y"
+}
+
+
+def rollup_projection(source: str) -> Dict[str, int]:
+    return {ANALYTICS_SOURCES[source][path]: 1 for path in ROLLUP_PATHS}
+
+
+def affects_rollups(source: str, changed_fields: Iterable[str]) -> bool:
+    roots = {ANALYTICS_SOURCES[source][path].split(".")[0] for path in ROLLUP_PATHS}
+    return any(field.split(".")[0] in roots for field in changed_fields)
+
+
+def _value(doc: Dict[str, Any], path: str) -> Any:
+    for part in path.split("."):
+        if not isinstance(doc, dict):
+            return None
+        doc = doc.get(part)
+    return doc
+
+
+def _day(value: Any) -> Optional[datetime]:
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        return None
+    return datetime(value.year, value.month, value.day)
+
+
+def rollup_counts(source: str, docs: Iterable[Dict[str, Any]]) -> Counter:
+    """Bucket keys each document contributes to.
+
+    Every dated document counts once in its violation_type None bucket and once per distinct violation type.
+    """
+    fields = ANALYTICS_SOURCES[source]
+    counts = Counter()
+    for doc in docs:
+        day = _day(_value(doc, fields["date"]))
+        if day is None:
+            continue
+        place = (_value(doc, fields["country"]), _value(doc, fields["region"]))
+        types = _value(doc, fields["violation_types"]) or []
+        for violation_type in [None, *dict.fromkeys(t for t in types if isinstance(t, str) and t)]:
+            counts[(source, day, *place, violation_type)] += 1
+    return counts
+
+
+async def record_rollup(db: Any, old: Optional[Counter], new: Optional[Counter]):
+    """Apply the difference between two rollup_counts results to the stored buckets."""
+    old, new = old or Counter(), new or Counter()
+    operations = []
+    for key in set(old) | set(new):
+        delta = new[key] - old[key]
+        if delta:
+            operations.append(UpdateOne(dict(zip(ROLLUP_KEY, key)), {"$inc": {"count": delta}}, upsert=True))
+    if operations:
+        await db[ROLLUP_COLLECTION].bulk_write(operations, ordered=False)
+        await analytics_cache.bump(db, ROLLUP_COLLECTION)
+
+
+async def create_rollup_indexes(collection: Any):
+    # Unique on the bucket key; equality fields lead so timelines scan only the requested day range.
+    await collection.create_index(
+        [("violation_type", 1), ("source", 1), ("day", 1), ("country", 1), ("region", 1)], unique=True
+    )
+
+
+async def rebuild_rollups(db: Any):
+    counts = Counter()
+    for source, fields in ANALYTICS_SOURCES.items():
+        cursor = db[fields["collection"]].find({fields["date"]: {"$ne": None}}, rollup_projection(source))
+        async for doc in cursor:
+            counts.update(rollup_counts(source, [doc]))
+    documents = [{**dict(zip(ROLLUP_KEY, key)), "count": count} for key, count in counts.items()]
+    await replace_collection(db, ROLLUP_COLLECTION, documents, create_rollup_indexes)
+    await analytics_cache.bump(db, ROLLUP_COLLECTION)
+
+
+async def ensure_rollups(db: Any):
+    if not await db[ROLLUP_COLLECTION].find_one({}, {"_id": 1}):
+        await rebuild_rollups(db)
+
+
+async def load_timeline(db: Any, filters: Dict[str, Any], time_unit: str, sources: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """Sum daily buckets into day, week, month or year totals for analytics_filters() filters."""
+    match = {
+        "source": {"$in": sources or list(ANALYTICS_SOURCES)},
+        "violation_type": filters.get("violation_type"),
+        "count": {"$gt": 0},
+    }
+    days = {}
+    if filters.get("start"):
+        days["$gte"] = _day(filters["start"])
+    if filters.get("end"):
+        days["$lte"] = filters["end"]
+    if days:
+        match["day"] = days
+    for key in ("country", "region"):
+        if filters.get(key):
+            match[key] = filters[key]
+    pipeline = [
+        {"$match": match},
+        {"$group": {"_id": {"$dateToString": {"format": TIME_FORMATS[time_unit], "date": "$day"}}, "count": {"$sum": "$count"}}},
+        {"$sort": {"_id": 1}},
+    ]
+    rows = await db[ROLLUP_COLLECTION].aggregate(pipeline).to_list(None)
+    return [{"date": row["_id"], "count": row["count"]} for row in rows]
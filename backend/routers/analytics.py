@@ -1,148 +1,22 @@
+import asyncio
 from fastapi import APIRouter, Depends, HTTPException, Query
 from motor.motor_asyncio import AsyncIOMotorClient
+from auth import require_admin
 from dependencies import get_db
-from datetime import datetime, timedelta
+from serialization import BSONResponse, dumps
+from cache import analytics_cache, lookup_cache
+from analytics_queries import (
+    ANALYTICS_SOURCES, SOURCE_NAMESPACES, analytics_filters, analytics_key, merge_counts, run_per_source, source_match
+)
+from clustering import GEODATA_POINT_LIMIT, MAX_ZOOM, POINTS_ZOOM, cell_size, cluster_pipeline, merge_clusters
+from geo import GEO_FIELD, geo_filter
+from geodata_formats import GEODATA_FORMATS, binary_response, geojson_response
+from rollups import ROLLUP_COLLECTION, TIME_FORMATS, load_timeline, rebuild_rollups
 from typing import Optional
 
 router = APIRouter(prefix="/analytics", tags=["Analytics"])
-
-def apply_date_filters(pipeline, start_date_str: Optional[str] = None, end_date_str: Optional[str] = None, date_field: str = "$created_at"):
-    date_match_stage = {}
-    if start_date_str:
-        try:
-            start_date = datetime.fromisoformat(start_date_str)
-            if 'T' not in start_date_str:
-                start_date = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
-            date_match_stage["$gte"] = start_date
-        except ValueError:
-            raise HTTPException(status_code=400, detail="Invalid start_date format. Use YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS.")
-    if end_date_str:
-        try:
-            end_date = datetime.fromisoformat(end_date_str)
-            if 'T' not in end_date_str:
-                end_date = end_date.replace(hour=23, minute=59, second=59, microsecond=999999)
-            date_match_stage["$lte"] = end_date
-        except ValueError:
-            raise HTTPException(status_code=400, detail="Invalid end_date format. Use YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS.")
-
-    if date_match_stage:
-        pipeline.append({"$match": {date_field: date_match_stage}})
-    return pipeline
-
-
-async def get_aggregated_data(
-    db: AsyncIOMotorClient,
-    collection_name: str,
-    date_field: str,
-    violation_field: str,
-    start_date: Optional[str] = None,
-    end_date: Optional[str] = None,
-    location_country: Optional[str] = None,
-    location_region: Optional[str] = None,
-    violation_type: Optional[str] = None,
-    group_by_field: str = None
-):
-    pipeline = []
-
-    match_criteria = {}
-    if location_country:
-        if collection_name == "cases":
-            match_criteria["location.country"] = location_country
-        elif collection_name == "incident_reports":
-            match_criteria["incident_details.location.country"] = location_country
-
-    if location_region:
-        if collection_name == "cases":
-            match_criteria["location.region"] = location_region
-        elif collection_name == "incident_reports":
-            match_criteria["incident_details.location.region"] = location_region
-
-    pipeline = apply_date_filters(pipeline, start_date, end_date, date_field)
-
-    if match_criteria:
-        pipeline.append({"$match": match_criteria})
-
-    if violation_field.endswith('violation_types'):
-        pipeline.append({"$unwind": f"${violation_field}"})
-        if violation_type:
-            pipeline.append({"$match": {violation_field: violation_type}})
-    elif violation_type and group_by_field == violation_field:
-            pipeline.append({"$match": {violation_field: violation_type}})
-
-    if group_by_field:
-        pipeline.append({"$group": {"_id": f"${group_by_field}", "count": {"$sum": 1}}})
-        pipeline.append({"$sort": {"count": -1}})
-    else:
-        pipeline.append({"$count": "total_count"})
-
-    return await db[collection_name].aggregate(pipeline).to_list(None)
-
-
-async def aggregate_collection(
-    db: AsyncIOMotorClient,
-    collection_name: str,
-    date_field_path: str,
-    time_unit: str,
-    start_date: Optional[str] = None,
-    end_date: Optional[str] = None,
-    location_country: Optional[str] = None,
-    location_region: Optional[str] = None,
-    violation_type: Optional[str] = None
-):
-    pipeline = []
-
-    match_criteria = {}
-    if location_country:
-        if collection_name == "cases":
-            match_criteria["location.country"] = location_country
-        elif collection_name == "incident_reports":
-            match_criteria["incident_details.location.country"] = location_country
-    if location_region:
-        if collection_name == "cases":
-            match_criteria["location.region"] = location_region
-        elif collection_name == "incident_reports":
-            match_criteria["incident_details.location.region"] = location_region
-
-    pipeline = apply_date_filters(pipeline, start_date, end_date, date_field_path)
-
-    if match_criteria:
-        pipeline.append({"$match": match_criteria})
-
-    if violation_type:
-        violation_field_path_in_collection = ""
-        if collection_name == "cases":
-            violation_field_path_in_collection = "violation_types"
-        elif collection_name == "incident_reports":
-            violation_field_path_in_collection = "incident_details.violation_types"
-
-        if violation_field_path_in_collection:
-            pipeline.append({"$unwind": f"${violation_field_path_in_collection}"})
-            pipeline.append({"$match": {violation_field_path_in_collection: violation_type}})
-
-    pipeline.append({
-        "$addFields": {
-            "converted_date": {
-                "$toDate": date_field_path
-            }
-        }
-    })
-
-    format_string = {
-        "day": "%Y-%m-%d",
-        "week": "%Y-%W",
-        "month": "%Y-%m",
-        "year": "%Y"
-    }
-
-    pipeline.append({
-        "$group": {
-            "_id": {"$dateToString": {"format": format_string[time_unit], "date": "$converted_date"}},
-            "count": {"$sum": 1}
-        }
-    })
-    pipeline.append({"$sort": {"_id": 1}})
-
-    return await db[collection_name].aggregate(pipeline).to_list(None)
+# Rebuilding rollups scans every case and report; one at a time per process is plenty.
+rollup_rebuild_lock = asyncio.Lock()
 
 
 @router.get("/violations", summary="Count violations by type")
@@ -150,43 +24,46 @@ async def count_violations_by_type(
     db: AsyncIOMotorClient = Depends(get_db),
     start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
     end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
+    year: Optional[str] = Query(None, description="Restrict to a calendar year (YYYY)"),
     location_country: Optional[str] = Query(None, description="Filter by country"),
     location_region: Optional[str] = Query(None, description="Filter by region")
 ):
-    results = {}
-
-    cases_pipeline = []
-    cases_pipeline = apply_date_filters(cases_pipeline, start_date, end_date, "$date_occurred")
-    if location_country:
-        cases_pipeline.append({"$match": {"location.country": location_country}})
-    if location_region:
-        cases_pipeline.append({"$match": {"location.region": location_region}})
-    cases_pipeline.append({"$unwind": "$violation_types"})
-    cases_pipeline.append({"$group": {"_id": "$violation_types", "count": {"$sum": 1}}})
-    cases_pipeline.append({"$project": {"violation_type": "$_id", "count": 1, "_id": 0}})
-
-    cases_data = await db["cases"].aggregate(cases_pipeline).to_list(None)
-
-    for item in cases_data:
-        results[item["violation_type"]] = results.get(item["violation_type"], 0) + item["count"]
-
-    reports_pipeline = []
-    reports_pipeline = apply_date_filters(reports_pipeline, start_date, end_date, "$incident_details.date")
-    if location_country:
-        reports_pipeline.append({"$match": {"incident_details.location.country": location_country}})
-    if location_region:
-        reports_pipeline.append({"$match": {"incident_details.location.region": location_region}})
-    reports_pipeline.append({"$unwind": "$incident_details.violation_types"})
-    reports_pipeline.append({"$group": {"_id": "$incident_details.violation_types", "count": {"$sum": 1}}})
-    reports_pipeline.append({"$project": {"violation_type": "$_id", "count": 1, "_id": 0}})
-
-    reports_data = await db["incident_reports"].aggregate(reports_pipeline).to_list(None)
-
-    for item in reports_data:
-        results[item["violation_type"]] = results.get(item["violation_type"], 0) + item["count"]
-
-    final_results = [{"violation_type": k, "count": v} for k, v in results.items()]
-    return sorted(final_results, key=lambda x: x["count"], reverse=True)
+    filters = analytics_filters(start_date, end_date, year, location_country, location_region)
+
+    def pipeline(name, source):
+        return [
+            {"$match": source_match(source, filters)},
+            {"$unwind": f"${source['violation_types']}"},
+            {"$group": {"_id": f"${source['violation_types']}", "count": {"$sum": 1}}},
+        ]
+
+    async def compute():
+        totals = merge_counts(await run_per_source(db, pipeline))
+        final_results = [{"violation_type": k, "count": v} for k, v in totals.items()]
+        return sorted(final_results, key=lambda x: x["count"], reverse=True)
+
+    results = await analytics_cache.get_or_compute(db, SOURCE_NAMESPACES, analytics_key("violations", filters), compute)
+    return BSONResponse(content=results)
+
+
+def point_pipeline(source: dict, match: dict, limit: Optional[int] = None):
+    fields = {
+        "id": {"$toString": "$_id"},
+        "source": source["label"],
+        "coordinates": f"${GEO_FIELD}.coordinates",
+        "violation_types": f"${source['violation_types']}",
+        "title": f"${source['title']}",
+        "status": f"${source['status']}",
+        "date": f"${source['date']}",
+        "_id": 0
+    }
+    if source["description"]:
+        fields["description"] = f"${source['description']}"
+    pipeline = [{"$match": match}]
+    if limit:
+        pipeline.append({"$limit": limit})
+    pipeline.append({"$project": fields})
+    return pipeline
 
 
 @router.get("/geodata", summary="Get geographical data for map visualization")
@@ -194,55 +71,70 @@ async def get_geographical_data(
     db: AsyncIOMotorClient = Depends(get_db),
     start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
     end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
-    violation_type: Optional[str] = Query(None, description="Filter by specific violation type")
+    year: Optional[str] = Query(None, description="Restrict to a calendar year (YYYY)"),
+    violation_type: Optional[str] = Query(None, description="Filter by specific violation type"),
+    bbox: Optional[str] = Query(None, description="Viewport as min_lng,min_lat,max_lng,max_lat"),
+    zoom: Optional[int] = Query(None, ge=0, le=MAX_ZOOM, description="Map zoom level; clusters points below GEODATA_POINTS_ZOOM"),
+    format: str = Query("json", description="json, geojson (streamed FeatureCollection) or binary (columnar)")
 ):
-    all_geodata = []
-
-    cases_pipeline = []
-    cases_pipeline = apply_date_filters(cases_pipeline, start_date, end_date, "$date_occurred")
-    if violation_type:
-        cases_pipeline.append({"$match": {"violation_types": violation_type}})
-    cases_pipeline.append({
-        "$project": {
-            "id": {"$toString": "$_id"},
-            "source": "case",
-            "coordinates": "$location.coordinates.coordinates",
-            "violation_types": "$violation_types",
-            "title": "$title",
-            "status": "$status",
-            "date": "$date_occurred",
-            "_id": 0
-        }
-    })
-    cases_pipeline.append({"$match": {"coordinates": {"$exists": True, "$ne": None, "$ne": []}}})
-
-
-    cases_geodata = await db["cases"].aggregate(cases_pipeline).to_list(None)
-    all_geodata.extend(cases_geodata)
-
-    reports_pipeline = []
-    reports_pipeline = apply_date_filters(reports_pipeline, start_date, end_date, "$incident_details.date")
-    if violation_type:
-        reports_pipeline.append({"$match": {"incident_details.violation_types": violation_type}})
-    reports_pipeline.append({
-        "$project": {
-            "id": {"$toString": "$_id"},
-            "source": "report",
-            "coordinates": "$incident_details.location.coordinates.coordinates",
-            "violation_types": "$incident_details.violation_types",
-            "description": "$incident_details.description",
-            "status": "$status",
-            "date": "$incident_details.date",
-            "_id": 0
-        }
-    })
-    reports_pipeline.append({"$match": {"coordinates": {"$exists": True, "$ne": None, "$ne": []}}})
-
-
-    reports_geodata = await db["incident_reports"].aggregate(reports_pipeline).to_list(None)
-    all_geodata.extend(reports_geodata)
-
-    return all_geodata
+    if format not in GEODATA_FORMATS:
+        raise HTTPException(status_code=400, detail="Invalid format. Must be 'json', 'geojson', or 'binary'.")
+    filters = analytics_filters(start_date, end_date, year, violation_type=violation_type)
+    try:
+        within = geo_filter(bbox=bbox) or {GEO_FIELD: {"$ne": None}}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    def match(source):
+        return {**source_match(source, filters), **within}
+
+    if zoom is not None and zoom < POINTS_ZOOM:
+        cell = cell_size(zoom)
+        # Clusters are a few per screen cell, so they are cached per viewport and filters;
+        # the output format is applied afterwards.
+        viewport = dumps(within)
+
+        async def compute_clusters():
+            results = await run_per_source(db, lambda name, source: cluster_pipeline(source, match(source), cell))
+            labels = {name: source["label"] for name, source in ANALYTICS_SOURCES.items()}
+            return merge_clusters(results, labels, cell)
+
+        clusters = await analytics_cache.get_or_compute(
+            db, SOURCE_NAMESPACES, analytics_key("geodata_clusters", filters, within=viewport, zoom=zoom), compute_clusters
+        )
+        if format == "geojson":
+            return geojson_response(clusters, {"zoom": zoom, "clustered": True, "cell_size": cell})
+        if format == "binary":
+            return binary_response(clusters, clustered=True)
+        return BSONResponse(content={"zoom": zoom, "clustered": True, "cell_size": cell, "features": clusters})
+
+    # Points are capped per source once a zoom is given; one extra row tells whether the viewport held more.
+    limit = GEODATA_POINT_LIMIT if zoom is not None else None
+    # Streamed GeoJSON reads straight from the cursors.
+    if format == "geojson":
+        truncated = []
+
+        async def points():
+            for name, source in ANALYTICS_SOURCES.items():
+                rows = 0
+                async for item in db[source["collection"]].aggregate(point_pipeline(source, match(source), limit and limit + 1)):
+                    rows += 1
+                    if limit and rows > limit:
+                        truncated.append(name)
+                        break
+                    yield item
+
+        return geojson_response(points(), {"zoom": zoom, "clustered": False}, lambda: {"truncated": bool(truncated)})
+
+    # Point lists are not cached: each viewport would hold its own copy of up to every point.
+    results = await run_per_source(db, lambda name, source: point_pipeline(source, match(source), limit and limit + 1))
+    points = [item for rows in results.values() for item in rows[:limit]]
+    truncated = bool(limit) and any(len(rows) > limit for rows in results.values())
+    if format == "binary":
+        return binary_response(points, clustered=False, truncated=truncated)
+    if zoom is None:
+        return BSONResponse(content=points)
+    return BSONResponse(content={"zoom": zoom, "clustered": False, "truncated": truncated, "features": points})
 
 
 @router.get("/timeline", summary="Get cases/reports over time")
@@ -251,42 +143,33 @@ async def get_timeline_data(
     time_unit: str = Query("month", description="Time unit for aggregation (day, week, month, year)"),
     start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
     end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
+    year: Optional[str] = Query(None, description="Restrict to a calendar year (YYYY)"),
     violation_type: Optional[str] = Query(None, description="Filter by specific violation type"),
     location_country: Optional[str] = Query(None, description="Filter by country"),
     location_region: Optional[str] = Query(None, description="Filter by region")
 ):
-    if time_unit not in ["day", "week", "month", "year"]:
+    if time_unit not in TIME_FORMATS:
         raise HTTPException(status_code=400, detail="Invalid time_unit. Must be 'day', 'week', 'month', or 'year'.")
+    filters = analytics_filters(start_date, end_date, year, location_country, location_region, violation_type)
+    results = await analytics_cache.get_or_compute(
+        db, ROLLUP_COLLECTION, analytics_key("timeline", filters, time_unit=time_unit), lambda: load_timeline(db, filters, time_unit)
+    )
+    return BSONResponse(content=results)
 
-    all_timeline_data = {}
 
-    cases_data = await aggregate_collection(
-        db,
-        "cases",
-        "$date_occurred",
-        time_unit,
-        start_date,
-        end_date,
-        location_country,
-        location_region,
-        violation_type
-    )
-    for item in cases_data:
-        all_timeline_data[item["_id"]] = all_timeline_data.get(item["_id"], 0) + item["count"]
+@router.post(
+    "/rollups/rebuild",
+    summary="Recompute the timeline rollups from cases and reports",
+    dependencies=[Depends(require_admin)]
+)
+async def rebuild_timeline_rollups(db: AsyncIOMotorClient = Depends(get_db)):
+    if rollup_rebuild_lock.locked():
+        raise HTTPException(status_code=409, detail="A rollup rebuild is already running")
+    async with rollup_rebuild_lock:
+        await rebuild_rollups(db)
+    return BSONResponse(content={"message": "Rollups rebuilt"})
 
-    reports_data = await aggregate_collection(
-        db,
-        "incident_reports",
-        "$incident_details.date",
-        time_unit,
-        start_date,
-        end_date,
-        location_country,
-        location_region,
-        violation_type
-    )
-    for item in reports_data:
-        all_timeline_data[item["_id"]] = all_timeline_data.get(item["_id"], 0) + item["count"]
 
-    final_results = [{"date": k, "count": v} for k, v in all_timeline_data.items()]
-    return sorted(final_results, key=lambda x: x["date"])
\ No newline at end of file
+@router.get("/cache/stats", summary="Hit and miss counters of the analytics and lookup caches")
+async def get_cache_stats():
+    return BSONResponse(content={"analytics": analytics_cache.stats(), "lookup": lookup_cache.stats()})
@@ -1,20 +1,43 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Query, Body, Depends
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Query, Body, Depends, Header, Request
 from typing import List, Optional, Dict, Any
 from bson import ObjectId
+from pymongo import ReturnDocument
 from datetime import datetime, date
 import os
 import shutil
 import json
+import logging
 import mimetypes
 import re
 from pydantic import BaseModel, Field, EmailStr
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 
 from dependencies import get_db
+from serialization import BSONResponse, dumps_line
+from cache import lookup_cache
+from vocabulary import load_vocabulary, record_terms
+from rollups import affects_rollups, record_rollup, rollup_counts, rollup_projection
+from evidence_store import adjust_references, release, store_uploads
+from normalization import MATCH_MODES, build_match, case_shadow_fields, nest_shadow_fields
+from text_search import search_fields, text_query
+from geo import geo_filter, geo_point, make_point
+from media import enqueue_evidence
+from change_feed import publish
+from status_history import (
+    apply_status_change, history_timestamp, load_status_history, record_applied_changes, record_status_events,
+    status_history_update
+)
+from idempotency import follow_up, release_key, replay_response, save_response
+from linking import MAX_LINKED_CASES, linked_reports_pipeline
+from projection import HIDDEN_FIELDS, build_projection
+from pagination import KEYSET_SORT, encode_cursor, keyset_filter, merge_filters
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 UPLOAD_DIRECTORY = "uploads"
+STREAM_BATCH_SIZE = 200
+MAX_PAGE_SIZE = 500
 if not os.path.exists(UPLOAD_DIRECTORY):
     os.makedirs(UPLOAD_DIRECTORY)
 
@@ -54,7 +77,9 @@ class Attachment(BaseModel):
     filepath: str
     mimetype: str
     size: int
+    sha256: Optional[str] = None
     uploaded_at: datetime = Field(default_factory=datetime.utcnow)
+    processing: Optional[Dict[str, Any]] = None
 
 class Location(BaseModel):
     country: str
@@ -84,38 +109,34 @@ class CaseUpdate(BaseModel):
     attachments: Optional[List[Attachment]] = None
     case_type: Optional[str] = Field(None, description="Type of the case, e.g., 'Human Rights', 'Environmental', 'Civil'.")
 
-def serialize_doc(doc: Any) -> Any:
-    if isinstance(doc, dict):
-        return {k: serialize_doc(v) for k, v in doc.items()}
-    elif isinstance(doc, list):
-        return [serialize_doc(item) for item in doc]
-    elif isinstance(doc, ObjectId):
-        return str(doc)
-    elif isinstance(doc, datetime):
-        return doc.isoformat()
-    else:
-        return doc
+async def stream_ndjson(cursor):
+    async for doc in cursor:
+        yield dumps_line(doc)
+
+async def load_case_titles(db: Any) -> List[Dict[str, Any]]:
+    titles_cursor = db["cases"].find({}, {"case_id": 1, "title": 1, "case_type": 1, "_id": 0})
+    titles_docs = await titles_cursor.to_list(length=None)
+    formatted_titles = []
+    for doc in titles_docs:
+        case_id = doc.get("case_id")
+        title = doc.get("title")
+        case_type = doc.get("case_type")
+        if isinstance(title, dict):
+            title = title.get("en") or title.get("ar") or next(iter(title.values()), None)
+        if case_id and title:
+            formatted_titles.append({
+                "case_id": case_id,
+                "title": title,
+                "case_type": case_type
+            })
+    formatted_titles.sort(key=lambda x: x["title"] or "")
+    return formatted_titles
 
 @router.get("/cases/titles")
 async def get_case_titles(db: Any = Depends(get_db)):
     try:
-        titles_cursor = db["cases"].find({}, {"case_id": 1, "title": 1, "case_type": 1, "_id": 0})
-        titles_docs = await titles_cursor.to_list(length=None)
-        formatted_titles = []
-        for doc in titles_docs:
-            case_id = doc.get("case_id")
-            title = doc.get("title")
-            case_type = doc.get("case_type")
-            if isinstance(title, dict):
-                title = title.get("en") or title.get("ar") or next(iter(title.values()), None)
-            if case_id and title:
-                formatted_titles.append({
-                    "case_id": case_id,
-                    "title": title,
-                    "case_type": case_type
-                })
-        formatted_titles.sort(key=lambda x: x["title"] or "")
-        return JSONResponse(content=formatted_titles)
+        formatted_titles = await lookup_cache.get_or_compute(db, "cases", "titles", lambda: load_case_titles(db))
+        return BSONResponse(content=formatted_titles)
     except Exception as e:
         print("❌ Error in GET /cases/titles:", e)
         raise HTTPException(status_code=500, detail=f"Failed to fetch case titles: {str(e)}")
@@ -123,25 +144,83 @@ async def get_case_titles(db: Any = Depends(get_db)):
 @router.get("/cases/violation_types")
 async def get_violation_types(db: Any = Depends(get_db), lang: str = "en"):
     try:
-        pipeline = [
-            {"$unwind": "$violation_types"},
-            {"$project": {"violation_type": "$violation_types", "_id": 0}}
-        ]
-        cursor = db["cases"].aggregate(pipeline)
-        docs = await cursor.to_list(length=None)
-        types = []
-        for doc in docs:
-            vt = doc.get("violation_type")
-            if isinstance(vt, str):
-                types.append(vt)
-            elif isinstance(vt, dict):
-                types.append(vt.get(lang) or next(iter(vt.values()), None))
-        distinct_types = sorted(set(filter(None, types)))
-        return JSONResponse(content=distinct_types)
+        terms = await lookup_cache.get_or_compute(
+            db, "vocabulary", ("terms", lang, ("cases",)), lambda: load_vocabulary(db, lang, ["cases"])
+        )
+        return BSONResponse(content=[term["violation_type"] for term in terms])
     except Exception as e:
         print("❌ Error in GET /cases/violation_types:", e)
         raise HTTPException(status_code=500, detail=f"Failed to fetch violation types: {e}")
 
+async def load_linked_reports(db: Any, case_ids: List[str], case_view: str, report_view: str, limit: int) -> List[Dict[str, Any]]:
+    pipeline = linked_reports_pipeline(
+        case_ids,
+        build_projection("cases", None, case_view),
+        build_projection("reports", None, report_view),
+        limit
+    )
+    return await db["cases"].aggregate(pipeline).to_list(length=len(case_ids))
+
+@router.get("/cases/linked_reports", summary="Get several cases with their linked reports in one query")
+async def get_linked_reports(
+    case_ids: str = Query(..., description="Comma-separated case ids"),
+    limit: int = Query(50, gt=0, le=MAX_PAGE_SIZE, description="Maximum reports returned per case, newest first"),
+    case_view: str = Query("summary", description="Named field set for cases: summary or full"),
+    report_view: str = Query("summary", description="Named field set for reports: summary or full"),
+    db: Any = Depends(get_db)
+):
+    try:
+        ids = list(dict.fromkeys(c.strip() for c in case_ids.split(",") if c.strip()))
+        if not ids or len(ids) > MAX_LINKED_CASES:
+            raise HTTPException(status_code=400, detail=f"Provide between 1 and {MAX_LINKED_CASES} case ids.")
+        cases = await load_linked_reports(db, ids, case_view, report_view, limit)
+        return BSONResponse(content=cases)
+    except HTTPException as e:
+        raise e
+    except Exception:
+        logger.exception("Failed to fetch linked reports for cases %s", case_ids)
+        raise HTTPException(status_code=500, detail="Failed to fetch linked reports")
+
+@router.get("/cases/{case_id}/reports", summary="Get a case with its linked reports")
+async def get_case_reports(
+    case_id: str,
+    limit: int = Query(50, gt=0, le=MAX_PAGE_SIZE, description="Maximum reports returned, newest first"),
+    case_view: str = Query("full", description="Named field set for the case: summary or full"),
+    report_view: str = Query("summary", description="Named field set for reports: summary or full"),
+    db: Any = Depends(get_db)
+):
+    try:
+        cases = await load_linked_reports(db, [case_id], case_view, report_view, limit)
+        if not cases:
+            raise HTTPException(status_code=404, detail="Case not found")
+        return BSONResponse(content=cases[0])
+    except HTTPException as e:
+        raise e
+    except Exception:
+        logger.exception("Failed to fetch reports linked to case %s", case_id)
+        raise HTTPException(status_code=500, detail="Failed to fetch case reports")
+
+@router.get("/cases/{case_id}/history", summary="Page through a case's full status history, newest first")
+async def get_case_history(
+    case_id: str,
+    limit: int = Query(50, gt=0, le=MAX_PAGE_SIZE),
+    after: Optional[str] = Query(None, description="Cursor returned as next_after by the previous page."),
+    db: Any = Depends(get_db)
+):
+    try:
+        events = await load_status_history(db, "cases", case_id, limit, keyset_filter(after, "change_date", descending=True))
+        has_more = len(events) > limit
+        events = events[:limit]
+        return BSONResponse(content={
+            "history": events,
+            "next_after": encode_cursor(events[-1], "change_date") if has_more else None
+        })
+    except HTTPException as e:
+        raise e
+    except Exception:
+        logger.exception("Failed to fetch status history for case %s", case_id)
+        raise HTTPException(status_code=500, detail="Failed to fetch case history")
+
 @router.post("/cases/")
 async def create_case(
     title: str = Form(...),
@@ -155,12 +234,24 @@ async def create_case(
     address: Optional[str] = Form(None),
     date_occurred: str = Form(...),
     case_type: Optional[str] = Form(None),
+    longitude: Optional[float] = Form(None),
+    latitude: Optional[float] = Form(None),
     files: List[UploadFile] = File(None),
+    request: Request = None,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     db: Any = Depends(get_db)
 ):
+    replay = await replay_response(db, request, "cases", idempotency_key)
+    if replay:
+        return replay
+    saved_files = []
     try:
         violation_types_list = [v.strip() for v in violation_types.split(',') if v.strip()]
         date_occurred_dt = datetime.strptime(date_occurred, "%Y-%m-%d")
+        try:
+            geolocation = make_point(longitude, latitude) if longitude is not None and latitude is not None else None
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         case_status_history = [
             StatusChange(new_status=status, changed_by="Initial Creation").dict()
         ]
@@ -175,44 +266,46 @@ async def create_case(
                 "region": region,
                 "city": city,
                 "address": address,
-                "geolocation": {"type": "Point", "coordinates": [0, 0]}
+                "geolocation": geolocation or {"type": "Point", "coordinates": [0, 0]}
             },
             "date_occurred": date_occurred_dt,
-            "case_id": f"PRM-{str(ObjectId())[:8]}",
+            "case_id": f"PRM-{ObjectId()}",
             "created_at": datetime.utcnow(),
             "updated_at": datetime.utcnow(),
             "attachments": [],
             "case_status_history": case_status_history,
             "case_type": case_type
         }
-        uploaded_attachments = []
-        if files:
-            for file in files:
-                if not file.filename:
-                    continue
-                file_extension = os.path.splitext(file.filename)[1]
-                unique_filename = f"{ObjectId()}{file_extension}"
-                file_path = os.path.join(UPLOAD_DIRECTORY, unique_filename)
-                with open(file_path, "wb") as buffer:
-                    shutil.copyfileobj(file.file, buffer)
-                attachment_data = Attachment(
-                    filename=unique_filename,
-                    filepath=file_path,
-                    mimetype=file.content_type,
-                    size=file.size,
-                    uploaded_at=datetime.utcnow()
-                )
-                uploaded_attachments.append(attachment_data.dict())
-        case_dict["attachments"] = uploaded_attachments
-        insert_result = await db["cases"].insert_one(case_dict)
-        returned_case = await db["cases"].find_one({"_id": insert_result.inserted_id})
-        return JSONResponse(content=serialize_doc(returned_case))
+        case_dict["normalized"] = nest_shadow_fields(case_shadow_fields(case_dict))
+        case_dict["search"] = search_fields(title, description)
+        case_dict["geo"] = geolocation
+        saved_files = await store_uploads(db, files)
+        case_dict["attachments"] = [Attachment(**saved, processing={"status": "pending"}).dict() for saved in saved_files]
+        await db["cases"].insert_one(case_dict)
     except HTTPException as e:
+        await follow_up([("release unsaved case attachments", release(db, saved_files))])
+        await release_key(db, "cases", idempotency_key)
         raise e
     except Exception as e:
         print("❌ Error in POST /cases/:", e)
+        await follow_up([("release unsaved case attachments", release(db, saved_files))])
+        await release_key(db, "cases", idempotency_key)
         raise HTTPException(status_code=500, detail=f"Failed to create case: {e}")
 
+    # The case is stored: answer (and remember the answer for the key) even if bookkeeping fails.
+    returned_case = {key: value for key, value in case_dict.items() if key not in HIDDEN_FIELDS}
+    response = BSONResponse(content=returned_case)
+    await follow_up([
+        ("store the idempotent response", save_response(db, "cases", idempotency_key, response)),
+        ("enqueue evidence processing", enqueue_evidence(db, "cases", case_dict["case_id"], case_dict["attachments"])),
+        ("invalidate cached case lookups", lookup_cache.bump(db, "cases")),
+        ("record the initial status event", record_status_events(db, "cases", [(case_dict["case_id"], case_status_history[0])])),
+        ("update violation vocabulary counters", record_terms(db, "cases", [], violation_types_list)),
+        ("update timeline rollups", record_rollup(db, None, rollup_counts("cases", [case_dict]))),
+    ])
+    publish("cases", "insert", case_dict["case_id"], status)
+    return response
+
 @router.get("/cases/")
 async def get_cases(
     db: Any = Depends(get_db),
@@ -223,34 +316,75 @@ async def get_cases(
     priority: Optional[str] = Query(None),
     search_term: Optional[str] = Query(None),
     date_occurred: Optional[str] = Query(None),
-    case_type: Optional[str] = Query(None)
+    case_type: Optional[str] = Query(None),
+    bbox: Optional[str] = Query(None, description="Viewport as min_lng,min_lat,max_lng,max_lat"),
+    near: Optional[str] = Query(None, description="Center point as lng,lat; requires radius"),
+    radius: Optional[float] = Query(None, description="Distance from near in meters"),
+    polygon: Optional[str] = Query(None, description="GeoJSON Polygon or JSON list of [lng, lat] pairs"),
+    after: Optional[str] = Query(None, description="Cursor returned as next_after by the previous page."),
+    limit: Optional[int] = Query(None, gt=0, le=MAX_PAGE_SIZE),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    match: str = Query("prefix", description="How filters compare: exact, prefix or contains (unindexed substring)."),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. title,status,location.country"),
+    view: str = Query("full", description="Named field set: summary or full. Ignored when fields is given.")
 ):
     try:
+        if match not in MATCH_MODES:
+            raise HTTPException(status_code=400, detail=f"Invalid match mode. Use one of: {', '.join(MATCH_MODES)}.")
         query = {}
-        if location_country:
-            query["location.country"] = {"$regex": location_country, "$options": "i"}
-        if location_region:
-            query["location.region"] = {"$regex": location_region, "$options": "i"}
-        if violation_type:
-            query["violation_types"] = {"$regex": violation_type, "$options": "i"}
-        if status:
-            query["status"] = {"$regex": status, "$options": "i"}
-        if priority:
-            query["priority"] = {"$regex": priority, "$options": "i"}
-        if search_term:
+        filters = {
+            "country": location_country,
+            "region": location_region,
+            "violation_types": violation_type,
+            "status": status,
+            "priority": priority,
+            "case_type": case_type,
+        }
+        for key, value in filters.items():
+            if value:
+                query.update(build_match(key, value, match))
+        text_search = text_query(search_term) if search_term else None
+        if text_search:
+            query["$text"] = text_search
+        elif search_term:
             query["$or"] = [
-                {"title": {"$regex": search_term, "$options": "i"}},
-                {"description": {"$regex": search_term, "$options": "i"}}
+                {"title": {"$regex": re.escape(search_term), "$options": "i"}},
+                {"description": {"$regex": re.escape(search_term), "$options": "i"}}
             ]
         if date_occurred:
             start = datetime.strptime(date_occurred, "%Y-%m-%d")
             end = start.replace(hour=23, minute=59, second=59, microsecond=999999)
             query["date_occurred"] = {"$gte": start, "$lte": end}
-        if case_type:
-            query["case_type"] = {"$regex": case_type, "$options": "i"}
-        cases_cursor = db["cases"].find(query)
+        try:
+            area = geo_filter(bbox, near, radius, polygon)
+        except (ValueError, TypeError) as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if area:
+            query.update(area)
+        if format == "ndjson":
+            query = merge_filters(query, keyset_filter(after))
+            projection = build_projection("cases", fields, view, required=("created_at",))
+            cases_cursor = db["cases"].find(query, projection).sort(KEYSET_SORT).batch_size(STREAM_BATCH_SIZE)
+            if limit:
+                cases_cursor = cases_cursor.limit(limit)
+            return StreamingResponse(stream_ndjson(cases_cursor), media_type="application/x-ndjson")
+        if after or limit:
+            page_size = limit or MAX_PAGE_SIZE
+            query = merge_filters(query, keyset_filter(after))
+            projection = build_projection("cases", fields, view, required=("created_at",))
+            cases_cursor = db["cases"].find(query, projection).sort(KEYSET_SORT).limit(page_size + 1)
+            cases = await cases_cursor.to_list(length=page_size + 1)
+            has_more = len(cases) > page_size
+            cases = cases[:page_size]
+            return BSONResponse(content={
+                "cases": cases,
+                "next_after": encode_cursor(cases[-1]) if has_more else None
+            })
+        cases_cursor = db["cases"].find(query, build_projection("cases", fields, view))
+        if text_search:
+            cases_cursor = cases_cursor.sort([("score", {"$meta": "textScore"})])
         cases = await cases_cursor.to_list(length=None)
-        return JSONResponse(content=[serialize_doc(c) for c in cases])
+        return BSONResponse(content=cases)
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -258,36 +392,102 @@ async def get_cases(
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 @router.get("/cases/{case_id}")
-async def get_case_by_id(case_id: str, db: Any = Depends(get_db)):
+async def get_case_by_id(
+    case_id: str,
+    db: Any = Depends(get_db),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    view: str = Query("full", description="Named field set: summary or full. Ignored when fields is given.")
+):
     try:
-        case = await db["cases"].find_one({"case_id": case_id})
+        case = await db["cases"].find_one({"case_id": case_id}, build_projection("cases", fields, view))
         if not case:
             raise HTTPException(status_code=404, detail="Case not found")
-        return JSONResponse(content=serialize_doc(case))
+        return BSONResponse(content=case)
+    except HTTPException as e:
+        raise e
     except Exception as e:
         print("❌ Error in GET /cases/{case_id}:", e)
         raise HTTPException(status_code=500, detail="Failed to fetch case")
 
+def build_case_update(update_data: Dict[str, Any], changed_by: str = "API Update", now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    now = now or history_timestamp()
+    fields = dict(update_data, updated_at=now)
+    fields.update(case_shadow_fields(update_data))
+    text = search_fields(update_data.get("title"), update_data.get("description"))
+    if "title" in update_data:
+        fields["search.title"] = text["title"]
+    if "description" in update_data:
+        fields["search.body"] = text["body"]
+    if "location" in update_data:
+        fields["geo"] = geo_point((update_data["location"] or {}).get("coordinates"))
+    pipeline = []
+    if "status" in update_data:
+        pipeline.append(status_history_update("cases", update_data["status"], changed_by, now))
+    pipeline.append({"$set": {key: {"$literal": value} for key, value in fields.items()}})
+    return pipeline
+
+def case_post_image(before: Dict[str, Any], update_data: Dict[str, Any], changed_by: str, now: datetime) -> Dict[str, Any]:
+    """The document build_case_update() leaves behind, derived from the pre-image it was applied to."""
+    after = dict(before, **update_data, updated_at=now)
+    if "status" in update_data:
+        apply_status_change("cases", before, after, update_data["status"], changed_by, now)
+    return after
+
+async def apply_case_update(db: Any, case_id: str, case_data: CaseUpdate) -> Dict[str, Any]:
+    update_data = case_data.dict(exclude_unset=True)
+    if not update_data:
+        raise HTTPException(status_code=400, detail="No fields to update provided")
+    changed_at = history_timestamp()
+    # The pre-image comes back from the same atomic write, so counter deltas cannot miss a concurrent update.
+    previous_case = await db["cases"].find_one_and_update(
+        {"case_id": case_id},
+        build_case_update(update_data, changed_by="API Update", now=changed_at),
+        projection=HIDDEN_FIELDS,
+        return_document=ReturnDocument.BEFORE
+    )
+    if not previous_case:
+        raise HTTPException(status_code=404, detail="Case not found")
+    updated_case = case_post_image(previous_case, update_data, "API Update", changed_at)
+    if "status" in update_data and previous_case.get("status") != update_data["status"]:
+        await record_status_events(db, "cases", [(case_id, updated_case["case_status_history"][-1])])
+    await lookup_cache.bump(db, "cases")
+    publish("cases", "status" if "status" in update_data else "update", case_id, updated_case.get("status"), list(update_data))
+    if "attachments" in update_data:
+        await adjust_references(db, previous_case.get("attachments"), update_data["attachments"])
+    if "violation_types" in update_data:
+        await record_terms(db, "cases", previous_case.get("violation_types"), update_data["violation_types"])
+    if affects_rollups("cases", update_data):
+        await record_rollup(db, rollup_counts("cases", [previous_case]), rollup_counts("cases", [updated_case]))
+    return updated_case
+
+class BulkStatusUpdate(BaseModel):
+    case_ids: List[str] = Field(..., min_length=1)
+    status: str
+    changed_by: str = "Bulk Update"
+
+@router.patch("/cases/bulk/status")
+async def bulk_update_case_status(payload: BulkStatusUpdate, db: Any = Depends(get_db)):
+    try:
+        changed_at = history_timestamp()
+        result = await db["cases"].update_many(
+            {"case_id": {"$in": payload.case_ids}},
+            build_case_update({"status": payload.status}, payload.changed_by, changed_at)
+        )
+        await lookup_cache.bump(db, "cases")
+        changed_ids = await record_applied_changes(db, "cases", payload.case_ids, changed_at, payload.changed_by)
+        # Ids that were missing or already at this status get no event.
+        for case_id in changed_ids:
+            publish("cases", "status", case_id, payload.status, ["status"])
+        return BSONResponse(content={"matched": result.matched_count, "modified": result.modified_count})
+    except Exception:
+        logger.exception("Failed to update the status of %s cases", len(payload.case_ids))
+        raise HTTPException(status_code=500, detail="Failed to update case statuses")
+
 @router.put("/cases/{case_id}")
 async def update_case(case_id: str, case_data: CaseUpdate, db: Any = Depends(get_db)):
     try:
-        existing_case = await db["cases"].find_one({"case_id": case_id})
-        if not existing_case:
-            raise HTTPException(status_code=404, detail="Case not found")
-        update_data = case_data.dict(exclude_unset=True)
-        if not update_data:
-            raise HTTPException(status_code=400, detail="No fields to update provided")
-        if "status" in update_data and update_data["status"] != existing_case.get("status"):
-            status_change = StatusChange(
-                old_status=existing_case.get("status"),
-                new_status=update_data["status"],
-                changed_by="API Update"
-            ).dict()
-            await db["cases"].update_one({"case_id": case_id}, {"$push": {"case_status_history": status_change}})
-        update_data["updated_at"] = datetime.utcnow()
-        await db["cases"].update_one({"case_id": case_id}, {"$set": update_data})
-        updated_case = await db["cases"].find_one({"_id": update_data.get("_id", existing_case["_id"])})
-        return JSONResponse(content=serialize_doc(updated_case))
+        updated_case = await apply_case_update(db, case_id, case_data)
+        return BSONResponse(content=updated_case)
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -297,23 +497,8 @@ async def update_case(case_id: str, case_data: CaseUpdate, db: Any = Depends(get
 @router.patch("/cases/{case_id}")
 async def partial_update_case(case_id: str, case_data: CaseUpdate, db: Any = Depends(get_db)):
     try:
-        existing_case = await db["cases"].find_one({"case_id": case_id})
-        if not existing_case:
-            raise HTTPException(status_code=404, detail="Case not found")
-        update_data = case_data.dict(exclude_unset=True)
-        if not update_data:
-            raise HTTPException(status_code=400, detail="No fields to update provided")
-        if "status" in update_data and update_data["status"] != existing_case.get("status"):
-            status_change = StatusChange(
-                old_status=existing_case.get("status"),
-                new_status=update_data["status"],
-                changed_by="API Update"
-            ).dict()
-            await db["cases"].update_one({"case_id": case_id}, {"$push": {"case_status_history": status_change}})
-        update_data["updated_at"] = datetime.utcnow()
-        await db["cases"].update_one({"case_id": case_id}, {"$set": update_data})
-        updated_case = await db["cases"].find_one({"_id": update_data.get("_id", existing_case["_id"])})
-        return JSONResponse(content=serialize_doc(updated_case))
+        updated_case = await apply_case_update(db, case_id, case_data)
+        return BSONResponse(content=updated_case)
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -323,10 +508,19 @@ async def partial_update_case(case_id: str, case_data: CaseUpdate, db: Any = Dep
 @router.delete("/cases/{case_id}")
 async def delete_case(case_id: str, db: Any = Depends(get_db)):
     try:
-        result = await db["cases"].delete_one({"case_id": case_id})
-        if result.deleted_count == 1:
-            return JSONResponse(content={"message": "Case deleted successfully"})
+        deleted_case = await db["cases"].find_one_and_delete(
+            {"case_id": case_id}, {"attachments": 1, "violation_types": 1, **rollup_projection("cases")}
+        )
+        if deleted_case:
+            await lookup_cache.bump(db, "cases")
+            publish("cases", "delete", case_id)
+            await record_terms(db, "cases", deleted_case.get("violation_types"), [])
+            await record_rollup(db, rollup_counts("cases", [deleted_case]), None)
+            await release(db, deleted_case.get("attachments"))
+            return BSONResponse(content={"message": "Case deleted successfully"})
         raise HTTPException(status_code=404, detail="Case not found")
+    except HTTPException as e:
+        raise e
     except Exception as e:
         print(f"❌ Error in DELETE /cases/{case_id}:", e)
         raise HTTPException(status_code=500, detail="Failed to delete case")
\ No newline at end of file
@@ -0,0 +1,59 @@
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from pymongo.errors import OperationFailure
+
+from change_feed import FEED_COLLECTIONS, change_stream_events, event_bus, open_change_stream, use_change_streams
+from dependencies import get_db
+from serialization import dumps
+
+router = APIRouter(tags=["Changes"])
+
+
+def format_event(event: Optional[Dict[str, Any]]) -> bytes:
+    if event is None:
+        return b": keepalive\n\n"
+    head = f"id: {event['event_id']}\n" if event.get("event_id") else ""
+    payload = {key: value for key, value in event.items() if key != "event_id"}
+    return f"{head}event: {event['operation']}\ndata: ".encode("utf-8") + dumps(payload) + b"\n\n"
+
+
+async def stream_events(request: Request, events: AsyncIterator[Optional[Dict[str, Any]]], collections: List[str]):
+    yield b"retry: 3000\n\n"
+    async for event in events:
+        if event is not None and event.get("collection", collections[0]) not in collections:
+            continue
+        yield format_event(event)
+        if event is None and await request.is_disconnected():
+            break
+
+
+@router.get("/changes/", summary="Stream inserts, updates, status changes and deletes as Server-Sent Events")
+async def stream_changes(
+    request: Request,
+    collections: str = Query(",".join(FEED_COLLECTIONS), description="Comma-separated collections to watch"),
+    after: Optional[str] = Query(None, description="Resume point for clients that cannot send Last-Event-ID"),
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+    db: Any = Depends(get_db)
+):
+    names = [name.strip() for name in collections.split(",") if name.strip()]
+    unknown = [name for name in names if name not in FEED_COLLECTIONS]
+    if not names or unknown:
+        raise HTTPException(status_code=400, detail=f"collections must be drawn from: {', '.join(FEED_COLLECTIONS)}")
+    resume = last_event_id or after
+    if await use_change_streams(db):
+        try:
+            stream = await open_change_stream(db, names, resume)
+        except OperationFailure as e:
+            if not resume:
+                raise
+            raise HTTPException(status_code=400, detail=f"Cannot resume the change feed from {resume!r}: {e}")
+        events = change_stream_events(stream)
+    else:
+        events = event_bus.subscribe(resume)
+    return StreamingResponse(
+        stream_events(request, events, names),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,105 @@
+import mimetypes
+import os
+import re
+from typing import Any, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
+
+from dependencies import get_db
+from evidence_store import blob_path, thumbnail_path
+
+router = APIRouter(tags=["Evidence"])
+
+CHUNK_SIZE = 256 * 1024
+SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+LEGACY_DIRECTORIES = ("uploads", "uploads/reports")
+
+
+def iter_file(path: str, start: int, length: int):
+    with open(path, "rb") as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def parse_range(header: str, size: int) -> Optional[tuple]:
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        start = max(size - int(last), 0)
+        end = size - 1
+    if start > end or start >= size:
+        raise HTTPException(status_code=416, detail="Requested range not satisfiable", headers={"Content-Range": f"bytes */{size}"})
+    return start, end
+
+
+def ranged_file_response(request: Request, path: str, etag: str, media_type: str, cache_control: str):
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Evidence file not found")
+    size = os.path.getsize(path)
+    headers = {"ETag": etag, "Accept-Ranges": "bytes", "Cache-Control": cache_control}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in [t.strip() for t in if_none_match.split(",")]):
+        return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range.strip() == etag):
+        byte_range = parse_range(range_header, size)
+        if byte_range:
+            start, end = byte_range
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+            headers["Content-Length"] = str(end - start + 1)
+            return StreamingResponse(iter_file(path, start, end - start + 1), status_code=206, media_type=media_type, headers=headers)
+
+    headers["Content-Length"] = str(size)
+    return StreamingResponse(iter_file(path, 0, size), media_type=media_type, headers=headers)
+
+
+@router.get("/evidence/{sha256}", summary="Download a stored evidence file by content hash")
+async def download_evidence(sha256: str, request: Request, db: Any = Depends(get_db)):
+    if not SHA256_RE.match(sha256):
+        raise HTTPException(status_code=400, detail="Invalid evidence hash")
+    blob = await db["evidence_blobs"].find_one({"_id": sha256, "deleting": {"$ne": True}})
+    if not blob:
+        raise HTTPException(status_code=404, detail="Evidence not found")
+    return ranged_file_response(
+        request,
+        blob.get("path") or blob_path(sha256),
+        f'"{sha256}"',
+        blob.get("mimetype") or "application/octet-stream",
+        "private, max-age=31536000, immutable"
+    )
+
+
+@router.get("/evidence/{sha256}/thumbnail", summary="Download the thumbnail generated for an image")
+async def download_thumbnail(sha256: str, request: Request):
+    if not SHA256_RE.match(sha256):
+        raise HTTPException(status_code=400, detail="Invalid evidence hash")
+    return ranged_file_response(request, thumbnail_path(sha256), f'"t-{sha256}"', "image/jpeg", "private, max-age=86400")
+
+
+@router.get("/attachments/{filename}", summary="Download an attachment stored before the evidence store")
+async def download_legacy_attachment(filename: str, request: Request):
+    if os.path.basename(filename) != filename or filename.startswith("."):
+        raise HTTPException(status_code=400, detail="Invalid filename")
+    for directory in LEGACY_DIRECTORIES:
+        path = os.path.join(directory, filename)
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            etag = f'W/"{stat.st_size:x}-{int(stat.st_mtime):x}"'
+            media_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+            return ranged_file_response(request, path, etag, media_type, "private, max-age=3600")
+    raise HTTPException(status_code=404, detail="Attachment not found")
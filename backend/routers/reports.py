@@ -5,28 +5,55 @@ from datetime import datetime, date
 import json
 import traceback
 import logging
+import asyncio
 
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Query, Depends
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Query, Depends, Header, Request
+from fastapi.responses import FileResponse
 from pydantic import BaseModel, Field, EmailStr
 from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError
 
 from dependencies import get_db
+from serialization import BSONResponse, dumps
+from cache import lookup_cache
+from pagination import KEYSET_SORT, encode_cursor, keyset_filter, merge_filters
+from vocabulary import load_vocabulary, record_terms
+from rollups import record_rollup, rollup_counts, rollup_projection
+from ingest import ROW_FORMATS, error_details, iter_rows
+from evidence_store import adjust_references, release, store_uploads
+from text_search import search_fields
+from geo import geo_filter, geo_point, make_point
+from media import enqueue_evidence
+from change_feed import publish
+from status_history import (
+    apply_status_change, history_timestamp, load_status_history, record_status_events, status_history_update
+)
+from idempotency import follow_up, release_key, replay_response, save_response
+from linking import report_case_pipeline
+from projection import HIDDEN_FIELDS, build_projection
 from pymongo.database import Database
 
 router = APIRouter()
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
 
 UPLOAD_DIRECTORY = "uploads/reports"
 os.makedirs(UPLOAD_DIRECTORY, exist_ok=True)
 
+BULK_BATCH_SIZE = 500
+MAX_PAGE_SIZE = 500
+TOTAL_MODES = ("exact", "estimated", "cached", "none")
+MAX_REPORTED_ERRORS = 1000
+
 class Attachment(BaseModel):
     filename: str
     filepath: str
     mimetype: str
     size: int
+    sha256: Optional[str] = None
     uploaded_at: datetime = Field(default_factory=datetime.utcnow)
+    processing: Optional[Dict[str, Any]] = None
 
 class StatusChange(BaseModel):
     old_status: Optional[str] = None
@@ -76,50 +103,160 @@ class ReportUpdate(BaseModel):
     pseudonym: Optional[str] = None
     contact_info: Optional[ContactInfo] = None
 
-
-def serialize_doc(doc: Any) -> Any:
-    if isinstance(doc, dict):
-        return {k: serialize_doc(v) for k, v in doc.items()}
-    elif isinstance(doc, list):
-        return [serialize_doc(item) for item in doc]
-    elif isinstance(doc, ObjectId):
-        return str(doc)
-    elif isinstance(doc, datetime):
-        return doc.isoformat()
-    elif isinstance(doc, Attachment):
-        doc_dict = doc.dict()
-        if 'filepath' in doc_dict and isinstance(doc_dict['filepath'], str):
-            doc_dict['filepath'] = doc_dict['filepath'].replace('\\', '/')
-        return doc_dict
+def parse_point(point: Any) -> Dict[str, Any]:
+    """Validate a GeoJSON Point given as [lng, lat]; it is stored in the same order."""
+    if not isinstance(point, dict) or \
+       point.get("type") != "Point" or \
+       not isinstance(point.get("coordinates"), list) or \
+       len(point["coordinates"]) != 2:
+        raise ValueError("Invalid GeoJSON Point structure for coordinates.")
+    return make_point(*point["coordinates"])
+
+def build_report_document(report: ReportCreate) -> Dict[str, Any]:
+    now = datetime.utcnow()
+    details = report.incident_details
+    return {
+        "title": report.title,
+        "reporter_type": report.reporter_type,
+        "priority": report.priority,
+        "status": report.status,
+        "related_case_id": report.related_case_id,
+        "report_id": f"IR-{ObjectId()}",
+        "created_at": now,
+        "updated_at": now,
+        "incident_details": details.dict(),
+        "evidence": [],
+        "report_status_history": [
+            StatusChange(new_status=report.status, changed_by="Initial Creation").dict()
+        ],
+        "anonymous": report.anonymous,
+        "pseudonym": report.pseudonym if report.anonymous else None,
+        "contact_info": report.contact_info.dict() if report.contact_info and not report.anonymous else None,
+        "search": search_fields(report.title, details.description),
+        "geo": geo_point(details.location.coordinates)
+    }
+
+def csv_row_to_report(row: Dict[str, str]) -> Dict[str, Any]:
+    if "longitude" in row or "latitude" in row:
+        coordinates = {"type": "Point", "coordinates": [row.get("longitude"), row.get("latitude")]}
     else:
-        return doc
+        coordinates = json.loads(row["coordinates"]) if "coordinates" in row else None
+    contact_info = {key: row[f"contact_{key}"] for key in ("email", "phone", "preferred_contact") if f"contact_{key}" in row}
+    report = {
+        "title": row.get("title"),
+        "reporter_type": row.get("reporter_type"),
+        "priority": row.get("priority"),
+        "related_case_id": row.get("related_case_id"),
+        "anonymous": row.get("anonymous", "false"),
+        "pseudonym": row.get("pseudonym"),
+        "contact_info": contact_info or None,
+        "incident_details": {
+            "date": row.get("incident_date"),
+            "description": row.get("description"),
+            "violation_types": [v.strip() for v in row.get("violation_types", "").replace(";", ",").split(",") if v.strip()],
+            "location": {
+                "country": row.get("country"),
+                "region": row.get("region"),
+                "city": row.get("city"),
+                "address": row.get("address"),
+                "coordinates": coordinates,
+            },
+        },
+    }
+    if "status" in row:
+        report["status"] = row["status"]
+    return report
+
+def row_to_document(row: Dict[str, Any], row_format: str) -> Dict[str, Any]:
+    if row_format == "csv":
+        row = csv_row_to_report(row)
+    # Shapes are checked by ReportCreate below; only look inside values that are objects.
+    details = row.get("incident_details")
+    location = details.get("location") if isinstance(details, dict) else None
+    raw_point = location.get("coordinates") if isinstance(location, dict) else None
+    report = ReportCreate(**row)
+    report.incident_details.location.coordinates = parse_point(raw_point) if raw_point else None
+    return build_report_document(report)
+
+async def insert_report_batch(db: Database, batch: List[tuple], errors: List[Dict[str, Any]]) -> int:
+    documents = [doc for _, doc in batch]
+    try:
+        result = await db["reports"].insert_many(documents, ordered=False)
+        inserted = len(result.inserted_ids)
+        failed_indexes = set()
+    except BulkWriteError as e:
+        inserted = e.details.get("nInserted", 0)
+        failed_indexes = set()
+        for write_error in e.details.get("writeErrors", []):
+            failed_indexes.add(write_error["index"])
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({"row": batch[write_error["index"]][0], "errors": [{"field": None, "message": write_error.get("errmsg")}]})
+    written = [doc for index, doc in enumerate(documents) if index not in failed_indexes]
+    await lookup_cache.bump(db, "reports")
+    await record_status_events(db, "reports", [(doc["report_id"], doc["report_status_history"][0]) for doc in written])
+    for doc in written:
+        publish("reports", "insert", doc["report_id"], doc["status"])
+    await record_terms(db, "reports", [], [vt for doc in written for vt in doc["incident_details"]["violation_types"]])
+    await record_rollup(db, None, rollup_counts("reports", written))
+    return inserted
+
+@router.post("/reports/bulk", summary="Bulk-import reports from an NDJSON or CSV stream")
+async def bulk_import_reports(
+    request: Request,
+    db: Database = Depends(get_db),
+    format: Optional[str] = Query(None, description="ndjson or csv; defaults from the Content-Type header"),
+    batch_size: int = Query(BULK_BATCH_SIZE, gt=0, le=5000)
+):
+    row_format = format or ("csv" if "csv" in request.headers.get("content-type", "") else "ndjson")
+    if row_format not in ROW_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format. Use one of: {', '.join(ROW_FORMATS)}.")
+    logger.info("Starting bulk report import (%s, batch size %s).", row_format, batch_size, extra={"format": row_format})
+    inserted = 0
+    failed = 0
+    errors: List[Dict[str, Any]] = []
+    batch: List[tuple] = []
+    try:
+        async for row_number, row in iter_rows(request.stream(), row_format):
+            try:
+                if isinstance(row, Exception):
+                    raise row
+                batch.append((row_number, row_to_document(row, row_format)))
+            except Exception as e:
+                # Converting a row touches no shared state, so any failure is that row's alone.
+                failed += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append({"row": row_number, "errors": error_details(e)})
+                continue
+            if len(batch) >= batch_size:
+                batch_inserted = await insert_report_batch(db, batch, errors)
+                inserted += batch_inserted
+                failed += len(batch) - batch_inserted
+                batch = []
+        if batch:
+            batch_inserted = await insert_report_batch(db, batch, errors)
+            inserted += batch_inserted
+            failed += len(batch) - batch_inserted
+    except Exception as e:
+        logger.error("Bulk report import aborted after %s inserts: %s", inserted, e, exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Bulk import aborted after {inserted} reports were inserted: {e}")
+    logger.info("Bulk report import finished: %s inserted, %s failed.", inserted, failed, extra={"inserted": inserted, "failed": failed})
+    return BSONResponse(content={"inserted": inserted, "failed": failed, "errors": errors})
 
 @router.get("/reports/analytics")
-async def get_reports_analytics(db: Database = Depends(get_db)):
+async def get_reports_analytics(db: Database = Depends(get_db), lang: str = Query("en")):
     try:
-        if await db["reports"].count_documents({}) == 0:
-            return JSONResponse(content={"analytics": []})
-
-        pipeline = [
-            {"$match": {"incident_details.violation_types": {"$exists": True, "$ne": [], "$type": "array"}}},
-            {"$unwind": "$incident_details.violation_types"},
-            {"$group": {
-                "_id": "$incident_details.violation_types",
-                "count": {"$sum": 1}
-            }},
-            {"$project": {
-                "violation_type": "$_id",
-                "count": 1,
-                "_id": 0
-            }},
-            {"$sort": {"count": -1}}
-        ]
-
-        analytics_cursor = db["reports"].aggregate(pipeline)
-        analytics_data = await analytics_cursor.to_list(length=None)
-        return JSONResponse(content={"analytics": analytics_data})
+        # Counters are kept current by record_terms on every write; see POST /vocabulary/rebuild.
+        terms = await lookup_cache.get_or_compute(
+            db, "vocabulary", ("terms", lang, ("reports",)), lambda: load_vocabulary(db, lang, ["reports"])
+        )
+        analytics_data = sorted(
+            ({"violation_type": term["violation_type"], "count": term["reports"]} for term in terms),
+            key=lambda item: item["count"],
+            reverse=True
+        )
+        return BSONResponse(content={"analytics": analytics_data})
     except Exception as e:
-        logging.error(f"Failed to fetch analytics: {e}", exc_info=True)
+        logger.error("Failed to fetch analytics: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=f"Failed to fetch analytics: {e}")
 
 @router.post("/reports/")
@@ -141,35 +278,33 @@ async def create_report(
     pseudonym: Optional[str] = Form(None),
     contact_info: Optional[str] = Form(None),
     files: List[UploadFile] = File(None, alias="evidence"),
+    request: Request = None,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     db: Database = Depends(get_db)
 ):
+    replay = await replay_response(db, request, "reports", idempotency_key)
+    if replay:
+        logger.info("Replayed report creation for Idempotency-Key %s.", idempotency_key)
+        return replay
+    saved_files = []
     try:
-        logging.info("Attempting to create a new report.")
+        logger.debug("Attempting to create a new report.")
         
         try:
             parsed_incident_date = datetime.strptime(incident_date, "%Y-%m-%d")
-            logging.info(f"Parsed incident_date: {parsed_incident_date}")
+            logger.debug("Parsed incident_date: %s", parsed_incident_date)
         except ValueError:
-            logging.error(f"Invalid incident date format received: {incident_date}")
+            logger.error("Invalid incident date format received: %s", incident_date)
             raise HTTPException(status_code=400, detail="Invalid incident date format. Use `YYYY-MM-DD`.")
 
         violation_types_list = [v.strip() for v in violation_type.split(',') if v.strip()]
-        logging.info(f"Parsed violation_types: {violation_types_list}")
+        logger.debug("Parsed violation_types: %s", violation_types_list)
 
         try:
-            parsed_coordinates = json.loads(incident_location_coordinates)
-            if not isinstance(parsed_coordinates, dict) or \
-               parsed_coordinates.get("type") != "Point" or \
-               not isinstance(parsed_coordinates.get("coordinates"), list) or \
-               len(parsed_coordinates["coordinates"]) != 2:
-                raise ValueError("Invalid GeoJSON Point structure for coordinates.")
-            parsed_coordinates["coordinates"] = [
-                float(parsed_coordinates["coordinates"][1]), 
-                float(parsed_coordinates["coordinates"][0])
-            ]
-            logging.info(f"Parsed coordinates: {parsed_coordinates}")
-        except (json.JSONDecodeError, ValueError) as e:
-            logging.error(f"Error parsing incident_location_coordinates: {e}. Raw: {incident_location_coordinates}")
+            parsed_coordinates = parse_point(json.loads(incident_location_coordinates))
+            logger.debug("Parsed coordinates: %s", parsed_coordinates)
+        except (json.JSONDecodeError, ValueError, TypeError) as e:
+            logger.error("Error parsing incident_location_coordinates: %s. Raw: %s", e, incident_location_coordinates)
             raise HTTPException(status_code=400, detail=f"Invalid incident_location_coordinates JSON format: {e}")
 
         parsed_contact_info = None
@@ -177,99 +312,90 @@ async def create_report(
             try:
                 parsed_contact_info_dict = json.loads(contact_info)
                 parsed_contact_info = ContactInfo(**parsed_contact_info_dict)
-                logging.info(f"Parsed contact_info: {parsed_contact_info.dict()}")
+                logger.debug("Parsed contact_info for non-anonymous report.")
             except (json.JSONDecodeError, ValueError) as e:
-                logging.error(f"Error parsing contact_info: {e}. Raw: {contact_info}")
+                logger.error("Error parsing contact_info: %s. Raw: %s", e, contact_info)
                 raise HTTPException(status_code=400, detail=f"Invalid contact_info JSON format: {e}")
         elif anonymous:
             parsed_contact_info = None
-            logging.info("Report is anonymous, contact_info set to None.")
+            logger.debug("Report is anonymous, contact_info set to None.")
+
+        report_dict = build_report_document(ReportCreate(
+            title=title,
+            reporter_type=reporter_type,
+            priority=priority,
+            status=status,
+            related_case_id=related_case_id,
+            anonymous=anonymous,
+            pseudonym=pseudonym,
+            contact_info=parsed_contact_info,
+            incident_details=IncidentDetails(
+                date=parsed_incident_date,
+                description=description,
+                violation_types=violation_types_list,
+                location=IncidentLocation(
+                    country=incident_location_country,
+                    region=incident_location_region,
+                    city=incident_location_city,
+                    address=incident_location_address,
+                    coordinates=parsed_coordinates
+                )
+            )
+        ))
+        logger.debug("Built report document %s", report_dict["report_id"])
 
-        incident_details_dict = {
-            "date": parsed_incident_date,
-            "description": description,
-            "violation_types": violation_types_list,
-            "location": {
-                "country": incident_location_country,
-                "region": incident_location_region,
-                "city": incident_location_city,
-                "address": incident_location_address,
-                "coordinates": parsed_coordinates
-            }
-        }
-        logging.info(f"Built incident_details: {incident_details_dict}")
-
-        report_dict = {
-            "title": title,
-            "reporter_type": reporter_type,
-            "priority": priority,
-            "status": status,
-            "related_case_id": related_case_id,
-            "report_id": f"IR-{str(ObjectId())[:8]}",
-            "created_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow(),
-            "incident_details": incident_details_dict,
-            "evidence": [],
-            "report_status_history": [
-                StatusChange(new_status=status, changed_by="Initial Creation").dict()
-            ],
-            "anonymous": anonymous,
-            "pseudonym": pseudonym if anonymous else None,
-            "contact_info": parsed_contact_info.dict() if parsed_contact_info else None
-        }
-        logging.info(f"Initial report_dict built: {report_dict}")
-
-        uploaded_evidence = []
-        if files:
-            for file_obj in files:
-                if not file_obj.filename:
-                    continue
-                file_extension = os.path.splitext(file_obj.filename)[1]
-                unique_filename = f"{ObjectId()}{file_extension}"
-                file_path = os.path.join(UPLOAD_DIRECTORY, unique_filename)
-                
-                file_path_for_db = file_path.replace("\\", "/") 
-
-                try:
-                    with open(file_path, "wb") as buffer:
-                        shutil.copyfileobj(file_obj.file, buffer)
-                    logging.info(f"File saved: {file_path}")
-
-                    attachment_data = Attachment(
-                        filename=unique_filename,
-                        filepath=file_path_for_db,
-                        mimetype=file_obj.content_type,
-                        size=file_obj.size if file_obj.size is not None else 0,
-                        uploaded_at=datetime.utcnow()
-                    )
-                    uploaded_evidence.append(attachment_data.dict())
-                except Exception as file_error:
-                    logging.error(f"Error saving file {file_obj.filename}: {file_error}", exc_info=True)
-                    raise HTTPException(status_code=500, detail=f"Failed to save evidence file {file_obj.filename}")
+        saved_files = await store_uploads(db, files)
+        for saved in saved_files:
+            logger.debug("File saved: %s (%s bytes, sha256=%s)", saved["filepath"], saved["size"], saved["sha256"])
+        uploaded_evidence = [Attachment(**saved, processing={"status": "pending"}).dict() for saved in saved_files]
 
         report_dict["evidence"] = uploaded_evidence
-        logging.info(f"Final report_dict before DB insert: {report_dict}")
 
         insert_result = await db["reports"].insert_one(report_dict)
-        logging.info(f"MongoDB insert result: Acknowledged={insert_result.acknowledged}, Inserted ID={insert_result.inserted_id}")
+        logger.info("Report %s created.", report_dict["report_id"], extra={"report_id": report_dict["report_id"], "evidence_count": len(uploaded_evidence)})
 
         if not insert_result.acknowledged:
             raise HTTPException(status_code=500, detail="Failed to insert report into database (not acknowledged).")
 
-        returned_report = await db["reports"].find_one({"_id": insert_result.inserted_id})
-        
-        if returned_report:
-            return JSONResponse(content=serialize_doc(returned_report), status_code=201)
-        else:
-            raise HTTPException(status_code=500, detail="Report created but could not be retrieved.")
-
     except HTTPException as e:
-        logging.error(f"HTTPException caught during report creation: {e.detail}")
+        logger.error("HTTPException caught during report creation: %s", e.detail)
+        await follow_up([("release unsaved report evidence", release(db, saved_files))])
+        await release_key(db, "reports", idempotency_key)
         raise e
     except Exception as e:
-        logging.error(f"Unexpected error during report creation: {e}", exc_info=True)
+        logger.error("Unexpected error during report creation: %s", e, exc_info=True)
+        await follow_up([("release unsaved report evidence", release(db, saved_files))])
+        await release_key(db, "reports", idempotency_key)
         raise HTTPException(status_code=500, detail=f"Failed to create report: {e}")
 
+    # The report is stored: answer (and remember the answer for the key) even if bookkeeping fails.
+    returned_report = {key: value for key, value in report_dict.items() if key not in HIDDEN_FIELDS}
+    response = BSONResponse(content=returned_report, status_code=201)
+    await follow_up([
+        ("store the idempotent response", save_response(db, "reports", idempotency_key, response)),
+        ("invalidate cached report lookups", lookup_cache.bump(db, "reports")),
+        ("record the initial status event", record_status_events(db, "reports", [(report_dict["report_id"], report_dict["report_status_history"][0])])),
+        ("update violation vocabulary counters", record_terms(db, "reports", [], violation_types_list)),
+        ("update timeline rollups", record_rollup(db, None, rollup_counts("reports", [report_dict]))),
+        # Anonymous reporters' photos lose their EXIF/GPS data in the background.
+        ("enqueue evidence processing", enqueue_evidence(db, "reports", report_dict["report_id"], uploaded_evidence, strip_metadata=report_dict["anonymous"])),
+    ])
+    publish("reports", "insert", report_dict["report_id"], report_dict["status"])
+    return response
+
+async def count_reports(db: Database, query: Dict[str, Any], mode: str) -> Optional[int]:
+    if mode == "none":
+        return None
+    if mode == "exact":
+        return await db["reports"].count_documents(query)
+    if not query:
+        # Approximate unfiltered totals come from collection metadata instead of a scan;
+        # it can be off after an unclean shutdown or on sharded clusters, so exact never uses it.
+        return await db["reports"].estimated_document_count()
+    return await lookup_cache.get_or_compute(
+        db, "reports", ("count", dumps(query)), lambda: db["reports"].count_documents(query)
+    )
+
 @router.get("/reports/")
 async def list_reports(
     db: Database = Depends(get_db),
@@ -277,10 +403,21 @@ async def list_reports(
     start_date: Optional[str] = Query(None, alias="start_date"),
     end_date: Optional[str] = Query(None, alias="end_date"),
     location: Optional[str] = Query(None),
-    limit: int = Query(10, gt=0),
-    offset: int = Query(0, ge=0)
+    bbox: Optional[str] = Query(None, description="Viewport as min_lng,min_lat,max_lng,max_lat"),
+    near: Optional[str] = Query(None, description="Center point as lng,lat; requires radius"),
+    radius: Optional[float] = Query(None, description="Distance from near in meters"),
+    polygon: Optional[str] = Query(None, description="GeoJSON Polygon or JSON list of [lng, lat] pairs"),
+    limit: int = Query(10, gt=0, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    after: Optional[str] = Query(None, description="Continuation token from next_after; replaces offset for deep pages."),
+    total: str = Query("exact", description="How to compute the total: exact, estimated, cached or none."),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. title,status,incident_details.date"),
+    view: str = Query("full", description="Named field set: summary or full. Ignored when fields is given.")
 ):
     try:
+        if total not in TOTAL_MODES:
+            raise HTTPException(status_code=400, detail=f"Invalid total mode. Use one of: {', '.join(TOTAL_MODES)}.")
+        projection = build_projection("reports", fields, view, required=("created_at",))
         query = {}
         if status:
             query["status"] = {"$regex": status, "$options": "i"}
@@ -310,171 +447,209 @@ async def list_reports(
                 {"incident_details.location.address": {"$regex": location, "$options": "i"}}
             ]
 
-        total_reports = await db["reports"].count_documents(query)
-        logging.info(f"Listing reports. Query: {query}, Total: {total_reports}")
-
-        reports_cursor = db["reports"].find(query).skip(offset).limit(limit)
-        reports_list = await reports_cursor.to_list(length=None)
-
-        return JSONResponse(content={"total": total_reports, "reports": [serialize_doc(r) for r in reports_list]})
+        try:
+            area = geo_filter(bbox, near, radius, polygon)
+        except (ValueError, TypeError) as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if area:
+            query.update(area)
+
+        # The page uses the keyset index; the total is counted alongside it rather than in a
+        # $facet, whose sub-pipelines sort in memory and share one 16MB result document.
+        page_query = merge_filters(query, keyset_filter(after))
+        reports_cursor = db["reports"].find(page_query, projection).sort(KEYSET_SORT).limit(limit + 1)
+        if not after:
+            reports_cursor = reports_cursor.skip(offset)
+        reports_list, total_reports = await asyncio.gather(
+            reports_cursor.to_list(length=limit + 1),
+            count_reports(db, query, total)
+        )
+        logger.debug("Listing reports. Query: %s, Total: %s", query, total_reports)
+
+        has_more = len(reports_list) > limit
+        reports_list = reports_list[:limit]
+        return BSONResponse(content={
+            "total": total_reports,
+            "reports": reports_list,
+            "next_after": encode_cursor(reports_list[-1]) if has_more else None
+        })
+    except HTTPException as e:
+        raise e
     except Exception as e:
-        logging.error(f"Failed to list reports: {e}", exc_info=True)
+        logger.error("Failed to list reports: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=f"Failed to list reports: {e}")
 
 
 @router.get("/reports/{report_id}")
-async def get_report_by_id(report_id: str, db: Database = Depends(get_db)):
+async def get_report_by_id(
+    report_id: str,
+    db: Database = Depends(get_db),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    view: str = Query("full", description="Named field set: summary or full. Ignored when fields is given.")
+):
     try:
-        logging.info(f"Fetching report with report_id: {report_id}")
-        report = await db["reports"].find_one({"report_id": report_id})
+        logger.debug("Fetching report with report_id: %s", report_id)
+        report = await db["reports"].find_one({"report_id": report_id}, build_projection("reports", fields, view))
         if report:
-            return JSONResponse(content=serialize_doc(report))
-        logging.warning(f"Report with report_id {report_id} not found.")
+            return BSONResponse(content=report)
+        logger.warning("Report with report_id %s not found.", report_id)
         raise HTTPException(status_code=404, detail="Report not found")
     except HTTPException as e:
         raise e
     except Exception as e:
-        logging.error(f"Failed to fetch report by ID: {e}", exc_info=True)
+        logger.error("Failed to fetch report by ID: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to fetch report")
 
-@router.put("/reports/{report_id}")
-async def update_report(report_id: str, report_data: ReportUpdate, db: Database = Depends(get_db)):
+@router.get("/reports/{report_id}/case", summary="Get a report together with its related case")
+async def get_report_case(
+    report_id: str,
+    db: Database = Depends(get_db),
+    report_view: str = Query("summary", description="Named field set for the report: summary or full"),
+    case_view: str = Query("summary", description="Named field set for the case: summary or full")
+):
     try:
-        logging.info(f"Updating report with report_id: {report_id}. Data: {report_data.dict(exclude_unset=True)}")
-        existing_report = await db["reports"].find_one({"report_id": report_id})
-        if not existing_report:
-            logging.warning(f"Report {report_id} not found for update.")
+        pipeline = report_case_pipeline(
+            report_id,
+            build_projection("reports", None, report_view),
+            build_projection("cases", None, case_view)
+        )
+        reports = await db["reports"].aggregate(pipeline).to_list(length=1)
+        if not reports:
             raise HTTPException(status_code=404, detail="Report not found")
+        return BSONResponse(content=reports[0])
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        logger.error("Failed to fetch case for report %s: %s", report_id, e, exc_info=True)
+        raise HTTPException(status_code=500, detail="Failed to fetch related case")
 
-        update_dict = report_data.dict(exclude_unset=True)
-
-        if "status" in update_dict and update_dict["status"] != existing_report.get("status"):
-            status_change = StatusChange(
-                old_status=existing_report.get("status"),
-                new_status=update_dict["status"],
-                changed_by="API Update"
-            ).dict()
-            await db["reports"].update_one(
-                {"report_id": report_id},
-                {"$push": {"report_status_history": status_change}}
-            )
-            logging.info(f"Status history updated for report {report_id}.")
-        
-        if "incident_details" in update_dict:
-            if "incident_details" in existing_report and isinstance(existing_report["incident_details"], dict):
-                existing_report["incident_details"].update(update_dict["incident_details"])
-            else:
-                existing_report["incident_details"] = update_dict["incident_details"]
-            del update_dict["incident_details"]
-            logging.info(f"Incident details updated for report {report_id}.")
-
-        if "evidence" in update_dict:
-            existing_report["evidence"] = [att.dict() for att in update_dict["evidence"]]
-            del update_dict["evidence"]
-            logging.info(f"Evidence updated for report {report_id}.")
-
-        update_dict["updated_at"] = datetime.utcnow()
-        
-        await db["reports"].update_one({"report_id": report_id}, {"$set": update_dict})
-        
-        set_nested_fields = {}
-        if "incident_details" in existing_report:
-            set_nested_fields["incident_details"] = existing_report["incident_details"]
-        if "evidence" in existing_report:
-            set_nested_fields["evidence"] = existing_report["evidence"]
-        
-        if set_nested_fields:
-            await db["reports"].update_one(
-                {"report_id": report_id},
-                {"$set": set_nested_fields}
-            )
-            logging.info(f"Nested fields (incident_details, evidence) pushed to DB for report {report_id}.")
+@router.get("/reports/{report_id}/history", summary="Page through a report's full status history, newest first")
+async def get_report_history(
+    report_id: str,
+    db: Database = Depends(get_db),
+    limit: int = Query(50, gt=0, le=MAX_PAGE_SIZE),
+    after: Optional[str] = Query(None, description="Continuation token from next_after.")
+):
+    try:
+        events = await load_status_history(db, "reports", report_id, limit, keyset_filter(after, "change_date", descending=True))
+        has_more = len(events) > limit
+        events = events[:limit]
+        return BSONResponse(content={
+            "history": events,
+            "next_after": encode_cursor(events[-1], "change_date") if has_more else None
+        })
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        logger.error("Failed to fetch history for report %s: %s", report_id, e, exc_info=True)
+        raise HTTPException(status_code=500, detail="Failed to fetch report history")
+
+def build_report_update(update_dict: Dict[str, Any], changed_by: str, now: datetime) -> List[Dict[str, Any]]:
+    """Update pipeline for a ReportUpdate; incident_details keys are merged into the stored ones."""
+    fields = {key: value for key, value in update_dict.items() if key != "incident_details"}
+    fields["updated_at"] = now
+    details = update_dict.get("incident_details") or {}
+    for key, value in details.items():
+        fields[f"incident_details.{key}"] = value
+    if "title" in update_dict:
+        fields["search.title"] = search_fields(update_dict["title"], None)["title"]
+    if "description" in details:
+        fields["search.body"] = search_fields(None, details["description"])["body"]
+    if "location" in details:
+        location = details["location"] if isinstance(details["location"], dict) else {}
+        fields["geo"] = geo_point(location.get("coordinates"))
+    pipeline = []
+    if "status" in update_dict:
+        pipeline.append(status_history_update("reports", update_dict["status"], changed_by, now))
+    pipeline.append({"$set": {key: {"$literal": value} for key, value in fields.items()}})
+    return pipeline
+
+def report_post_image(before: Dict[str, Any], update_dict: Dict[str, Any], changed_by: str, now: datetime) -> Dict[str, Any]:
+    """The document build_report_update() leaves behind, derived from the pre-image it was applied to."""
+    after = dict(before, **{key: value for key, value in update_dict.items() if key != "incident_details"}, updated_at=now)
+    if update_dict.get("incident_details"):
+        previous_details = before.get("incident_details")
+        after["incident_details"] = {**(previous_details if isinstance(previous_details, dict) else {}), **update_dict["incident_details"]}
+    if "status" in update_dict:
+        apply_status_change("reports", before, after, update_dict["status"], changed_by, now)
+    return after
+
+async def apply_report_update(db: Database, report_id: str, update_dict: Dict[str, Any]) -> Dict[str, Any]:
+    changed_at = history_timestamp()
+    # The pre-image comes back from the same atomic write, so counter deltas cannot miss a concurrent update.
+    previous_report = await db["reports"].find_one_and_update(
+        {"report_id": report_id},
+        build_report_update(update_dict, "API Update", changed_at),
+        projection=HIDDEN_FIELDS,
+        return_document=ReturnDocument.BEFORE
+    )
+    if not previous_report:
+        logger.warning("Report %s not found for update.", report_id)
+        raise HTTPException(status_code=404, detail="Report not found")
+    updated_report = report_post_image(previous_report, update_dict, "API Update", changed_at)
+    status_changed = "status" in update_dict and previous_report.get("status") != update_dict["status"]
+    if status_changed:
+        await record_status_events(db, "reports", [(report_id, updated_report["report_status_history"][-1])])
+    await lookup_cache.bump(db, "reports")
+    publish("reports", "status" if status_changed else "update", report_id, updated_report.get("status"), list(update_dict))
+    if "evidence" in update_dict:
+        await adjust_references(db, previous_report.get("evidence"), update_dict["evidence"])
+    details = update_dict.get("incident_details") or {}
+    if "violation_types" in details:
+        previous_violation_types = (previous_report.get("incident_details") or {}).get("violation_types")
+        await record_terms(db, "reports", previous_violation_types, details["violation_types"])
+    if details:
+        await record_rollup(db, rollup_counts("reports", [previous_report]), rollup_counts("reports", [updated_report]))
+    return updated_report
 
-        updated_report = await db["reports"].find_one({"report_id": report_id})
-        logging.info(f"Report {report_id} successfully updated.")
-        return JSONResponse(content=serialize_doc(updated_report))
+@router.put("/reports/{report_id}")
+async def update_report(report_id: str, report_data: ReportUpdate, db: Database = Depends(get_db)):
+    try:
+        logger.debug("Updating report %s. Fields: %s", report_id, report_data.model_fields_set)
+        updated_report = await apply_report_update(db, report_id, report_data.dict(exclude_unset=True))
+        logger.info("Report %s successfully updated.", report_id, extra={"report_id": report_id})
+        return BSONResponse(content=updated_report)
     except HTTPException as e:
         raise e
     except Exception as e:
-        logging.error(f"Failed to update report {report_id}: {e}", exc_info=True)
+        logger.error("Failed to update report %s: %s", report_id, e, exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to update report")
 
 @router.patch("/reports/{report_id}")
 async def partial_update_report(report_id: str, report_data: ReportUpdate, db: Database = Depends(get_db)):
     try:
-        logging.info(f"Partially updating report with report_id: {report_id}. Data: {report_data.dict(exclude_unset=True)}")
-        existing_report = await db["reports"].find_one({"report_id": report_id})
-        if not existing_report:
-            logging.warning(f"Report {report_id} not found for partial update.")
-            raise HTTPException(status_code=404, detail="Report not found")
-
+        logger.debug("Partially updating report %s. Fields: %s", report_id, report_data.model_fields_set)
         update_dict = report_data.dict(exclude_unset=True)
-
         if not update_dict:
             raise HTTPException(status_code=400, detail="No fields to update provided")
-
-        if "status" in update_dict and update_dict["status"] != existing_report.get("status"):
-            status_change = StatusChange(
-                old_status=existing_report.get("status"),
-                new_status=update_dict["status"],
-                changed_by="API Update"
-            ).dict()
-            await db["reports"].update_one(
-                {"report_id": report_id},
-                {"$push": {"report_status_history": status_change}}
-            )
-            logging.info(f"Status history updated for report {report_id} during partial update.")
-
-        if "incident_details" in update_dict:
-            if "incident_details" in existing_report and isinstance(existing_report["incident_details"], dict):
-                existing_report["incident_details"].update(update_dict["incident_details"])
-            else:
-                existing_report["incident_details"] = update_dict["incident_details"]
-            del update_dict["incident_details"]
-            logging.info(f"Incident details updated for report {report_id} during partial update.")
-
-        if "evidence" in update_dict:
-            existing_report["evidence"] = [att.dict() for att in update_dict["evidence"]]
-            del update_dict["evidence"]
-            logging.info(f"Evidence updated for report {report_id} during partial update.")
-
-        update_dict["updated_at"] = datetime.utcnow()
-        await db["reports"].update_one({"report_id": report_id}, {"$set": update_dict})
-
-        set_nested_fields = {}
-        if "incident_details" in existing_report:
-            set_nested_fields["incident_details"] = existing_report["incident_details"]
-        if "evidence" in existing_report:
-            set_nested_fields["evidence"] = existing_report["evidence"]
-        
-        if set_nested_fields:
-            await db["reports"].update_one(
-                {"report_id": report_id},
-                {"$set": set_nested_fields}
-            )
-            logging.info(f"Nested fields (incident_details, evidence) pushed to DB for report {report_id} during partial update.")
-
-        updated_report = await db["reports"].find_one({"report_id": report_id})
-        logging.info(f"Report {report_id} successfully partially updated.")
-        return JSONResponse(content=serialize_doc(updated_report))
+        updated_report = await apply_report_update(db, report_id, update_dict)
+        logger.info("Report %s successfully partially updated.", report_id, extra={"report_id": report_id})
+        return BSONResponse(content=updated_report)
     except HTTPException as e:
         raise e
     except Exception as e:
-        logging.error(f"Failed to partially update report {report_id}: {e}", exc_info=True)
+        logger.error("Failed to partially update report %s: %s", report_id, e, exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to partially update report")
 
 @router.delete("/reports/{report_id}")
 async def delete_report(report_id: str, db: Database = Depends(get_db)):
     try:
-        logging.info(f"Deleting report with report_id: {report_id}")
-        result = await db["reports"].delete_one({"report_id": report_id})
-        if result.deleted_count == 1:
-            logging.info(f"Report {report_id} deleted successfully.")
-            return JSONResponse(content={"message": "Report deleted successfully"})
-        logging.warning(f"Report {report_id} not found for deletion.")
+        logger.debug("Deleting report with report_id: %s", report_id)
+        deleted_report = await db["reports"].find_one_and_delete(
+            {"report_id": report_id}, {"evidence": 1, **rollup_projection("reports")}
+        )
+        if deleted_report:
+            await release(db, deleted_report.get("evidence"))
+            await lookup_cache.bump(db, "reports")
+            publish("reports", "delete", report_id)
+            await record_terms(db, "reports", (deleted_report.get("incident_details") or {}).get("violation_types"), [])
+            await record_rollup(db, rollup_counts("reports", [deleted_report]), None)
+            logger.info("Report %s deleted successfully.", report_id, extra={"report_id": report_id})
+            return BSONResponse(content={"message": "Report deleted successfully"})
+        logger.warning("Report %s not found for deletion.", report_id)
         raise HTTPException(status_code=404, detail="Report not found")
     except HTTPException as e:
         raise e
     except Exception as e:
-        logging.error(f"Failed to delete report {report_id}: {e}", exc_info=True)
+        logger.error("Failed to delete report %s: %s", report_id, e, exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to delete report")
\ No newline at end of file
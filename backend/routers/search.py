@@ -0,0 +1,78 @@
+import asyncio
+import logging
+from typing import Any, List
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from dependencies import get_db
+from serialization import BSONResponse
+from text_search import SOURCES, get_path, highlight, text_query, tokenize
+
+router = APIRouter(prefix="/search", tags=["Search"])
+logger = logging.getLogger(__name__)
+
+
+async def search_source(db: Any, source_name: str, search: dict, terms: set, window: int):
+    source = SOURCES[source_name]
+    query = {"$text": search}
+    projection = {
+        "_id": 0,
+        source["id"]: 1,
+        source["title"]: 1,
+        source["body"]: 1,
+        "status": 1,
+        "score": {"$meta": "textScore"},
+    }
+    collection = db[source["collection"]]
+    cursor = collection.find(query, projection).sort([("score", {"$meta": "textScore"})]).limit(window)
+    docs, total = await asyncio.gather(cursor.to_list(length=window), collection.count_documents(query))
+    hits = []
+    for doc in docs:
+        title = get_path(doc, source["title"])
+        body = get_path(doc, source["body"])
+        if isinstance(title, dict):
+            title = title.get("en") or title.get("ar") or next(iter(title.values()), None)
+        hits.append({
+            "source": source_name,
+            "id": doc.get(source["id"]),
+            "title": title,
+            "status": doc.get("status"),
+            "score": doc.get("score", 0),
+            "highlights": {
+                "title": highlight(title, terms),
+                "description": highlight(body, terms),
+            },
+        })
+    return hits, total
+
+
+@router.get("/", summary="Ranked full-text search over cases and reports")
+async def search(
+    db: Any = Depends(get_db),
+    q: str = Query(..., min_length=1, description="Free-text query (Arabic or English)"),
+    sources: List[str] = Query(list(SOURCES), description="Sources to search: cases, reports"),
+    limit: int = Query(20, gt=0, le=100),
+    offset: int = Query(0, ge=0, le=1000)
+):
+    unknown = [s for s in sources if s not in SOURCES]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown search source(s): {', '.join(unknown)}")
+    search_spec = text_query(q)
+    if not search_spec:
+        return BSONResponse(content={"total": 0, "hits": [], "limit": limit, "offset": offset})
+    terms = set(tokenize(q))
+    try:
+        results = await asyncio.gather(*[
+            search_source(db, name, search_spec, terms, offset + limit) for name in dict.fromkeys(sources)
+        ])
+    except Exception:
+        logger.exception("Search for %r failed", q)
+        raise HTTPException(status_code=500, detail="Search failed")
+    hits = sorted((hit for source_hits, _ in results for hit in source_hits), key=lambda h: h["score"], reverse=True)
+    total = sum(source_total for _, source_total in results)
+    return BSONResponse(content={
+        "total": total,
+        "hits": hits[offset:offset + limit],
+        "limit": limit,
+        "offset": offset
+    })
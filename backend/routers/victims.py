@@ -4,6 +4,7 @@ from typing import List, Optional, Dict, Any
 from bson import ObjectId
 from datetime import datetime
 from dependencies import get_db
+from serialization import BSONResponse, with_id
 
 router = APIRouter(prefix="/victims", tags=["Victims"])
 
@@ -79,19 +80,7 @@ async def create_individual(individual: IndividualCreate, db=Depends(get_db)):
 async def list_individuals(db=Depends(get_db)):
     individuals = await db["individuals"].find().to_list(1000)
 
-    for person in individuals:
-        person["id"] = str(person["_id"])
-        del person["_id"]
-
-        if "cases_involved" in person and isinstance(person["cases_involved"], list):
-            person["cases_involved"] = [str(c) for c in person["cases_involved"]]
-        
-        if "created_at" in person and isinstance(person["created_at"], datetime):
-            person["created_at"] = person["created_at"].isoformat()
-        if "updated_at" in person and isinstance(person["updated_at"], datetime):
-            person["updated_at"] = person["updated_at"].isoformat()
-
-    return individuals
+    return BSONResponse(content=[with_id(person) for person in individuals])
 
 @router.delete("/{id}")
 async def delete_individual(id: str, db=Depends(get_db)):
@@ -113,18 +102,7 @@ async def get_victim(victim_id: str, db=Depends(get_db)):
     if not victim:
         raise HTTPException(status_code=404, detail="Victim not found")
 
-    victim["id"] = str(victim["_id"])
-    del victim["_id"]
-
-    if "cases_involved" in victim and isinstance(victim["cases_involved"], list):
-        victim["cases_involved"] = [str(c) for c in victim["cases_involved"]]
-    
-    if "created_at" in victim and isinstance(victim["created_at"], datetime):
-        victim["created_at"] = victim["created_at"].isoformat()
-    if "updated_at" in victim and isinstance(victim["updated_at"], datetime):
-        victim["updated_at"] = victim["updated_at"].isoformat()
-
-    return victim
+    return BSONResponse(content=with_id(victim))
 
 @router.patch("/{victim_id}")
 async def update_individual_risk_level(victim_id: str, risk_update: RiskLevelUpdate, db=Depends(get_db)):
@@ -154,15 +132,7 @@ async def update_individual_risk_level(victim_id: str, risk_update: RiskLevelUpd
 
     updated_individual = await db["individuals"].find_one({"_id": ObjectId(victim_id)})
     if updated_individual:
-        updated_individual["id"] = str(updated_individual["_id"])
-        del updated_individual["_id"]
-        if "cases_involved" in updated_individual and isinstance(updated_individual["cases_involved"], list):
-            updated_individual["cases_involved"] = [str(c) for c in updated_individual["cases_involved"]]
-        if "created_at" in updated_individual and isinstance(updated_individual["created_at"], datetime):
-            updated_individual["created_at"] = updated_individual["created_at"].isoformat()
-        if "updated_at" in updated_individual and isinstance(updated_individual["updated_at"], datetime):
-            updated_individual["updated_at"] = updated_individual["updated_at"].isoformat()
-        return updated_individual
+        return BSONResponse(content=with_id(updated_individual))
     
     return {"message": "Individual risk level updated successfully"}
 
@@ -174,16 +144,4 @@ async def list_victims_by_case_id(case_id: str, db=Depends(get_db)):
     if not individuals:
         return [] 
 
-    for person in individuals:
-        person["id"] = str(person["_id"])
-        del person["_id"]
-
-        if "cases_involved" in person and isinstance(person["cases_involved"], list):
-            person["cases_involved"] = [str(c) for c in person["cases_involved"]]
-        
-        if "created_at" in person and isinstance(person["created_at"], datetime):
-            person["created_at"] = person["created_at"].isoformat()
-        if "updated_at" in person and isinstance(person["updated_at"], datetime):
-            person["updated_at"] = person["updated_at"].isoformat()
-
-    return individuals
+    return BSONResponse(content=[with_id(person) for person in individuals])
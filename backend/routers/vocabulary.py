@@ -0,0 +1,61 @@
+import asyncio
+import logging
+from typing import Any, List
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from auth import require_admin
+from cache import lookup_cache
+from dependencies import get_db
+from serialization import BSONResponse
+from vocabulary import VIOLATION_FIELDS, check_vocabulary, load_vocabulary, rebuild_vocabulary
+
+router = APIRouter(prefix="/vocabulary", tags=["Vocabulary"])
+logger = logging.getLogger(__name__)
+# Full recounts scan every case and report; one at a time per process is plenty.
+rebuild_lock = asyncio.Lock()
+
+
+@router.get("/violation_types", summary="Distinct violation types with usage counts")
+async def get_violation_vocabulary(
+    db: Any = Depends(get_db),
+    lang: str = Query("en", description="Preferred label language for multilingual terms"),
+    source: List[str] = Query(list(VIOLATION_FIELDS), description="Sources to count: cases, reports")
+):
+    unknown = [s for s in source if s not in VIOLATION_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown source(s): {', '.join(unknown)}")
+    sources = sorted(set(source))
+    try:
+        terms = await lookup_cache.get_or_compute(
+            db, "vocabulary", ("terms", lang, tuple(sources)), lambda: load_vocabulary(db, lang, sources)
+        )
+        return BSONResponse(content=terms)
+    except Exception:
+        logger.exception("Failed to fetch the violation vocabulary")
+        raise HTTPException(status_code=500, detail="Failed to fetch violation vocabulary")
+
+
+@router.post(
+    "/rebuild",
+    summary="Recompute the violation vocabulary from cases and reports",
+    dependencies=[Depends(require_admin)]
+)
+async def rebuild_violation_vocabulary(db: Any = Depends(get_db)):
+    if rebuild_lock.locked():
+        raise HTTPException(status_code=409, detail="A vocabulary recount is already running")
+    async with rebuild_lock:
+        await rebuild_vocabulary(db)
+    return BSONResponse(content={"message": "Vocabulary rebuilt"})
+
+
+@router.get(
+    "/check",
+    summary="Compare the stored violation counters with a full recount",
+    dependencies=[Depends(require_admin)]
+)
+async def check_violation_vocabulary(db: Any = Depends(get_db)):
+    if rebuild_lock.locked():
+        raise HTTPException(status_code=409, detail="A vocabulary recount is already running")
+    async with rebuild_lock:
+        return BSONResponse(content=await check_vocabulary(db))
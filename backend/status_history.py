@@ -0,0 +1,117 @@
+import os
+from datetime import datetime
+from typing import Any, Dict, Iterable, List
+
+from pymongo import UpdateOne
+
+from projection import ID_FIELDS
+
+STATUS_EVENTS = "status_events"
+MIGRATIONS = "migrations"
+# Only the newest entries stay inline on the document; status_events holds the full history.
+INLINE_HISTORY_LIMIT = int(os.getenv("INLINE_STATUS_HISTORY", 10))
+HISTORY_FIELDS = {"cases": "case_status_history", "reports": "report_status_history"}
+HISTORY_SORT = [("change_date", -1), ("_id", -1)]
+
+
+def history_timestamp() -> datetime:
+    """Current time at MongoDB's millisecond precision, so it can be matched after a round trip."""
+    now = datetime.utcnow()
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+
+def status_event(entity: str, entity_id: str, entry: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "entity": entity,
+        "entity_id": entity_id,
+        "old_status": entry.get("old_status"),
+        "new_status": entry.get("new_status"),
+        "change_date": entry.get("change_date"),
+        "changed_by": entry.get("changed_by"),
+    }
+
+
+async def record_status_events(db: Any, entity: str, changes: Iterable[tuple]):
+    """Append (entity_id, status change entry) pairs to the status_events collection."""
+    events = [status_event(entity, entity_id, entry) for entity_id, entry in changes]
+    if events:
+        await db[STATUS_EVENTS].insert_many(events, ordered=False)
+
+
+def capped_push(entry: Dict[str, Any]) -> Dict[str, Any]:
+    return {"$each": [entry], "$slice": -INLINE_HISTORY_LIMIT}
+
+
+def status_history_update(entity: str, new_status: str, changed_by: str, changed_at: datetime) -> Dict[str, Any]:
+    """Pipeline stage appending a status change only when the stored status differs, keeping the last few inline."""
+    field = HISTORY_FIELDS[entity]
+    entry = {
+        "old_status": "$status",
+        "new_status": {"$literal": new_status},
+        "change_date": changed_at,
+        "changed_by": {"$literal": changed_by},
+    }
+    return {"$set": {field: {"$cond": [
+        {"$ne": ["$status", {"$literal": new_status}]},
+        {"$slice": [{"$concatArrays": [{"$ifNull": [f"${field}", []]}, [entry]]}, -INLINE_HISTORY_LIMIT]},
+        f"${field}"
+    ]}}}
+
+
+def apply_status_change(entity: str, before: Dict[str, Any], after: Dict[str, Any], new_status: str, changed_by: str, changed_at: datetime):
+    """Mirror status_history_update() on a post-image built from the pre-image `before`."""
+    if before.get("status") == new_status:
+        return
+    field = HISTORY_FIELDS[entity]
+    entry = {
+        "old_status": before.get("status"),
+        "new_status": new_status,
+        "change_date": changed_at,
+        "changed_by": changed_by,
+    }
+    after[field] = ((before.get(field) or []) + [entry])[-INLINE_HISTORY_LIMIT:]
+
+
+async def record_applied_changes(db: Any, entity: str, entity_ids: List[str], changed_at: datetime, changed_by: str) -> List[str]:
+    """Record the status changes a pipeline update appended inline at changed_at; returns the changed ids.
+
+    Documents whose status was already the new one got no inline entry and produce no event.
+    """
+    field = HISTORY_FIELDS[entity]
+    cursor = db[entity].find(
+        {ID_FIELDS[entity]: {"$in": entity_ids}, field: {"$elemMatch": {"change_date": changed_at, "changed_by": changed_by}}},
+        {ID_FIELDS[entity]: 1, field: {"$slice": -1}}
+    )
+    changes = [(doc[ID_FIELDS[entity]], doc[field][-1]) async for doc in cursor]
+    await record_status_events(db, entity, changes)
+    return [entity_id for entity_id, _ in changes]
+
+
+async def load_status_history(db: Any, entity: str, entity_id: str, limit: int, extra: Dict[str, Any]) -> List[Dict[str, Any]]:
+    query = {"entity": entity, "entity_id": entity_id, **extra}
+    cursor = db[STATUS_EVENTS].find(query, {"entity": 0, "entity_id": 0}).sort(HISTORY_SORT).limit(limit + 1)
+    return await cursor.to_list(length=limit + 1)
+
+
+async def migrate_status_history(db: Any):
+    """Copy inline status histories into status_events once, then trim them to the inline limit.
+
+    Events are upserted on (entity, entity_id, change_date, new_status) so an interrupted run can be repeated.
+    """
+    if await db[MIGRATIONS].find_one({"_id": STATUS_EVENTS}):
+        return
+    for entity, field in HISTORY_FIELDS.items():
+        id_field = ID_FIELDS[entity]
+        async for doc in db[entity].find({f"{field}.0": {"$exists": True}}, {id_field: 1, field: 1}):
+            operations = []
+            for entry in doc[field]:
+                event = status_event(entity, doc.get(id_field), entry)
+                key = {k: event[k] for k in ("entity", "entity_id", "change_date", "new_status")}
+                operations.append(UpdateOne(key, {"$setOnInsert": event}, upsert=True))
+            await db[STATUS_EVENTS].bulk_write(operations, ordered=False)
+            if len(doc[field]) > INLINE_HISTORY_LIMIT:
+                await db[entity].update_one(
+                    {"_id": doc["_id"]},
+                    {"$push": {field: {"$each": [], "$slice": -INLINE_HISTORY_LIMIT}}}
+                )
+    await db[MIGRATIONS].insert_one({"_id": STATUS_EVENTS, "completed_at": datetime.utcnow()})
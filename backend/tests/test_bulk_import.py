@@ -0,0 +1,54 @@
+import asyncio
+import json
+
+import pytest
+
+from ingest import iter_rows
+from routers.reports import row_to_document
+
+VALID_ROW = {
+    "title": "Night raid",
+    "reporter_type": "witness",
+    "priority": "high",
+    "anonymous": True,
+    "incident_details": {
+        "date": "2024-02-03T00:00:00",
+        "description": "House searched",
+        "violation_types": ["Arbitrary detention"],
+        "location": {"country": "Palestine", "coordinates": {"type": "Point", "coordinates": [35.2, 31.9]}},
+    },
+}
+
+
+def rows(payload: bytes, row_format: str):
+    async def chunks():
+        yield payload
+
+    async def collect():
+        return [row async for row in iter_rows(chunks(), row_format)]
+
+    return asyncio.run(collect())
+
+
+@pytest.mark.parametrize("row", [
+    {**VALID_ROW, "incident_details": "oops"},
+    {**VALID_ROW, "incident_details": {**VALID_ROW["incident_details"], "location": "Gaza"}},
+    {**VALID_ROW, "incident_details": {**VALID_ROW["incident_details"], "location": {"coordinates": "35.2,31.9"}}},
+])
+def test_malformed_rows_fail_validation(row):
+    with pytest.raises(ValueError):
+        row_to_document(row, "ndjson")
+
+
+def test_malformed_row_does_not_stop_the_stream():
+    lines = [VALID_ROW, {**VALID_ROW, "incident_details": "oops"}, VALID_ROW]
+    payload = b"\n".join(json.dumps(line).encode() for line in lines) + b"\n\xff\n"
+    results = []
+    for row_number, row in rows(payload, "ndjson"):
+        try:
+            if isinstance(row, Exception):
+                raise row
+            results.append((row_number, row_to_document(row, "ndjson")["title"]))
+        except Exception as e:
+            results.append((row_number, type(e).__name__))
+    assert results == [(1, "Night raid"), (2, "ValidationError"), (3, "Night raid"), (4, "UnicodeDecodeError")]
@@ -0,0 +1,26 @@
+from clustering import merge_clusters
+
+
+def row(x, y, violation_type, count, documents=0, lng=0.0, lat=0.0):
+    return {"_id": {"x": x, "y": y, "type": violation_type}, "count": count, "documents": documents, "lng": lng, "lat": lat}
+
+
+def test_multilingual_violation_types_are_merged_by_term():
+    results = {
+        "cases": [
+            row(1, 2, {"en": "Torture", "ar": "تعذيب"}, 2, documents=2, lng=69.0, lat=63.0),
+            row(1, 2, "torture ", 1, documents=1, lng=34.5, lat=31.5),
+            row(1, 2, "Arbitrary detention", 1),
+        ],
+        "reports": [row(1, 2, None, 1, documents=1, lng=34.5, lat=31.5)],
+    }
+    clusters = merge_clusters(results, {"cases": "case", "reports": "report"}, 1.0)
+    assert len(clusters) == 1
+    cluster = clusters[0]
+    assert cluster["count"] == 4
+    assert cluster["coordinates"] == [34.5, 31.5]
+    assert cluster["sources"] == {"case": 3, "report": 1}
+    assert cluster["violation_types"] == [
+        {"violation_type": "Torture", "count": 3},
+        {"violation_type": "Arbitrary detention", "count": 1},
+    ]
@@ -0,0 +1,109 @@
+import html
+import re
+import unicodedata
+from typing import Any, Dict, List, Optional
+
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+ARABIC_LETTER_MAP = str.maketrans({
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا",
+    "ى": "ي", "ئ": "ي", "ؤ": "و", "ة": "ه",
+    "ـ": None,
+})
+ARABIC_PREFIXES = ("وال", "بال", "كال", "فال", "لل", "ال")
+
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is", "it",
+    "of", "on", "or", "that", "the", "to", "was", "were", "with",
+    "في", "من", "على", "الى", "عن", "مع", "هذا", "هذه", "ذلك", "التي", "الذي", "او", "و", "ثم",
+}
+
+TEXT_INDEX_WEIGHTS = {"search.title": 5, "search.body": 1}
+
+# Where each searchable source keeps its id, title and free-text body.
+SOURCES = {
+    "cases": {"collection": "cases", "id": "case_id", "title": "title", "body": "description"},
+    "reports": {"collection": "reports", "id": "report_id", "title": "title", "body": "incident_details.description"},
+}
+
+
+def normalize_token(word: str) -> str:
+    word = unicodedata.normalize("NFKD", word.lower())
+    word = "".join(ch for ch in word if not unicodedata.combining(ch))
+    word = word.translate(ARABIC_LETTER_MAP)
+    for prefix in ARABIC_PREFIXES:
+        if word.startswith(prefix) and len(word) - len(prefix) >= 2:
+            word = word[len(prefix):]
+            break
+    return word
+
+
+STOPWORDS = {normalize_token(word) for word in _STOPWORDS}
+
+
+def tokenize(text: Any) -> List[str]:
+    if isinstance(text, dict):
+        text = " ".join(v for v in text.values() if isinstance(v, str))
+    if not isinstance(text, str):
+        return []
+    tokens = []
+    for word in WORD_RE.findall(text):
+        token = normalize_token(word)
+        if len(token) > 1 and token not in STOPWORDS:
+            tokens.append(token)
+    return tokens
+
+
+def get_path(doc: Dict[str, Any], path: str) -> Any:
+    for part in path.split("."):
+        if not isinstance(doc, dict):
+            return None
+        doc = doc.get(part)
+    return doc
+
+
+def search_fields(title: Any, body: Any) -> Dict[str, str]:
+    return {"title": " ".join(tokenize(title)), "body": " ".join(tokenize(body))}
+
+
+def text_query(term: str) -> Optional[Dict[str, Any]]:
+    tokens = tokenize(term)
+    if not tokens:
+        return None
+    return {"$search": " ".join(dict.fromkeys(tokens))}
+
+
+def highlight(text: Any, terms: set, max_length: int = 200) -> Optional[str]:
+    if isinstance(text, dict):
+        text = text.get("en") or text.get("ar") or next(iter(text.values()), None)
+    if not isinstance(text, str) or not text:
+        return None
+    matches = [m for m in WORD_RE.finditer(text) if normalize_token(m.group()) in terms]
+    if not matches:
+        return None
+    start = max(0, matches[0].start() - max_length // 4)
+    end = min(len(text), start + max_length)
+    parts = []
+    cursor = start
+    for m in matches:
+        if m.start() < start or m.end() > end:
+            continue
+        parts.append(html.escape(text[cursor:m.start()]))
+        parts.append(f"<mark>{html.escape(m.group())}</mark>")
+        cursor = m.end()
+    parts.append(html.escape(text[cursor:end]))
+    snippet = "".join(parts)
+    if start > 0:
+        snippet = "…" + snippet
+    if end < len(text):
+        snippet += "…"
+    return snippet
+
+
+async def backfill_search_fields(db: Any):
+    for source in SOURCES.values():
+        collection = db[source["collection"]]
+        cursor = collection.find({"search": {"$exists": False}}, {source["title"]: 1, source["body"]: 1})
+        async for doc in cursor:
+            fields = search_fields(get_path(doc, source["title"]), get_path(doc, source["body"]))
+            await collection.update_one({"_id": doc["_id"]}, {"$set": {"search": fields}})
@@ -0,0 +1,82 @@
+import asyncio
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+from fastapi import HTTPException, UploadFile
+
+CHUNK_SIZE = 1024 * 1024
+MAX_FILE_SIZE = int(os.getenv("MAX_UPLOAD_FILE_SIZE", 100 * 1024 * 1024))
+MAX_REQUEST_SIZE = int(os.getenv("MAX_UPLOAD_REQUEST_SIZE", 250 * 1024 * 1024))
+
+UPLOAD_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="upload")
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+def _copy_and_hash(source: Any, destination: str, limit: int) -> Dict[str, Any]:
+    sha256 = hashlib.sha256()
+    size = 0
+    source.seek(0)
+    try:
+        with open(destination, "wb") as buffer:
+            while True:
+                chunk = source.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > limit:
+                    raise UploadTooLarge()
+                sha256.update(chunk)
+                buffer.write(chunk)
+    except BaseException:
+        if os.path.exists(destination):
+            os.remove(destination)
+        raise
+    return {"size": size, "sha256": sha256.hexdigest()}
+
+
+def _remove_files(paths: List[str]):
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+async def save_uploads(files: Optional[List[UploadFile]], directory: str) -> List[Dict[str, Any]]:
+    """Stream uploads to `directory` off the event loop, enforcing per-file and per-request limits.
+
+    Returns one dict per stored file with filename, filepath, mimetype, size and sha256.
+    """
+    loop = asyncio.get_running_loop()
+    saved = []
+    remaining = MAX_REQUEST_SIZE
+    try:
+        for file in files or []:
+            if not file.filename:
+                continue
+            if file.size is not None and file.size > MAX_FILE_SIZE:
+                raise HTTPException(status_code=413, detail=f"File {file.filename} exceeds the {MAX_FILE_SIZE} byte limit")
+            if file.size is not None and file.size > remaining:
+                raise HTTPException(status_code=413, detail=f"Upload exceeds the {MAX_REQUEST_SIZE} byte request limit")
+            unique_filename = f"{ObjectId()}{os.path.splitext(file.filename)[1]}"
+            file_path = os.path.join(directory, unique_filename)
+            limit = min(MAX_FILE_SIZE, remaining)
+            try:
+                result = await loop.run_in_executor(UPLOAD_EXECUTOR, _copy_and_hash, file.file, file_path, limit)
+            except UploadTooLarge:
+                raise HTTPException(status_code=413, detail=f"File {file.filename} exceeds the upload size limit")
+            remaining -= result["size"]
+            saved.append({
+                "filename": unique_filename,
+                "filepath": file_path.replace("\\", "/"),
+                "mimetype": file.content_type or "application/octet-stream",
+                **result,
+            })
+    except BaseException:
+        await loop.run_in_executor(UPLOAD_EXECUTOR, _remove_files, [item["filepath"] for item in saved])
+        raise
+    return saved
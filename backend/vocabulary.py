@@ -0,0 +1,125 @@
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional
+
+from pymongo import UpdateOne
+
+from cache import lookup_cache
+from normalization import normalize
+from rebuild import replace_collection
+
+VOCABULARY_COLLECTION = "violation_vocabulary"
+
+# Where each source keeps its violation type list.
+VIOLATION_FIELDS = {"cases": "violation_types", "reports": "incident_details.violation_types"}
+
+
+def term_labels(value: Any) -> Dict[str, str]:
+    if isinstance(value, dict):
+        return {lang: label for lang, label in value.items() if isinstance(label, str) and label.strip()}
+    if isinstance(value, str) and value.strip():
+        return {"default": value.strip()}
+    return {}
+
+
+def term_key(value: Any) -> Optional[str]:
+    return normalize(value)
+
+
+def term_label(doc: Dict[str, Any], lang: str) -> Optional[str]:
+    labels = doc.get("labels") or {}
+    return labels.get(lang) or labels.get("default") or next(iter(labels.values()), None)
+
+
+def _count_terms(values: Optional[Iterable[Any]]) -> Counter:
+    counts = Counter()
+    for value in values or []:
+        key = term_key(value)
+        if key:
+            counts[key] += 1
+    return counts
+
+
+async def record_terms(db: Any, source: str, old_values: Optional[Iterable[Any]], new_values: Optional[Iterable[Any]]):
+    """Apply the difference between two violation type lists to the vocabulary counters."""
+    old_values, new_values = list(old_values or []), list(new_values or [])
+    old, new = _count_terms(old_values), _count_terms(new_values)
+    labels = {term_key(value): term_labels(value) for value in new_values}
+    operations = []
+    for key in set(old) | set(new):
+        delta = new[key] - old[key]
+        if not delta:
+            continue
+        operations.append(UpdateOne(
+            {"_id": key},
+            {"$inc": {f"counts.{source}": delta}, "$setOnInsert": {"labels": labels.get(key) or {"default": key}}},
+            upsert=True
+        ))
+    if operations:
+        await db[VOCABULARY_COLLECTION].bulk_write(operations, ordered=False)
+        await lookup_cache.bump(db, "vocabulary")
+
+
+async def load_vocabulary(db: Any, lang: str, sources: List[str]) -> List[Dict[str, Any]]:
+    query = {"$or": [{f"counts.{source}": {"$gt": 0}} for source in sources]}
+    docs = await db[VOCABULARY_COLLECTION].find(query).to_list(length=None)
+    terms = []
+    for doc in docs:
+        counts = {source: max(doc.get("counts", {}).get(source, 0), 0) for source in sources}
+        label = term_label(doc, lang)
+        if label:
+            terms.append({"violation_type": label, "count": sum(counts.values()), **counts})
+    terms.sort(key=lambda t: t["violation_type"].lower())
+    return terms
+
+
+async def aggregate_terms(db: Any) -> Dict[str, Dict[str, Any]]:
+    """Count violation types from scratch with a server-side $group per source."""
+    totals: Dict[str, Dict[str, Any]] = {}
+    for source, field in VIOLATION_FIELDS.items():
+        pipeline = [
+            {"$unwind": f"${field}"},
+            {"$group": {"_id": f"${field}", "count": {"$sum": 1}}}
+        ]
+        async for row in db[source].aggregate(pipeline):
+            key = term_key(row["_id"])
+            if not key:
+                continue
+            entry = totals.setdefault(key, {"_id": key, "labels": {}, "counts": {}, "label_counts": Counter()})
+            for lang, label in term_labels(row["_id"]).items():
+                entry["label_counts"][(lang, label)] += row["count"]
+            entry["counts"][source] = entry["counts"].get(source, 0) + row["count"]
+    for entry in totals.values():
+        # The most frequently used spelling wins as the display label.
+        for (lang, label), _ in entry.pop("label_counts").most_common():
+            entry["labels"].setdefault(lang, label)
+    return totals
+
+
+async def create_vocabulary_indexes(collection: Any):
+    for source in VIOLATION_FIELDS:
+        await collection.create_index([(f"counts.{source}", -1)])
+
+
+async def rebuild_vocabulary(db: Any):
+    totals = await aggregate_terms(db)
+    await replace_collection(db, VOCABULARY_COLLECTION, list(totals.values()), create_vocabulary_indexes)
+    await lookup_cache.bump(db, "vocabulary")
+
+
+async def check_vocabulary(db: Any) -> Dict[str, Any]:
+    """Compare the stored counters with a full aggregation and list every difference."""
+    actual = await aggregate_terms(db)
+    stored = {doc["_id"]: doc async for doc in db[VOCABULARY_COLLECTION].find({}, {"counts": 1})}
+    mismatches = []
+    for key in sorted(set(actual) | set(stored)):
+        for source in VIOLATION_FIELDS:
+            expected = actual.get(key, {}).get("counts", {}).get(source, 0)
+            counted = max(stored.get(key, {}).get("counts", {}).get(source, 0), 0)
+            if expected != counted:
+                mismatches.append({"term": key, "source": source, "stored": counted, "actual": expected})
+    return {"consistent": not mismatches, "terms": len(actual), "mismatches": mismatches}
+
+
+async def ensure_vocabulary(db: Any):
+    if not await db[VOCABULARY_COLLECTION].find_one({}, {"_id": 1}):
+        await rebuild_vocabulary(db)
@@ -0,0 +1,31 @@
+import asyncio
+import logging
+import signal
+
+from dependencies import db_instance
+from jobs import WORKER_CONCURRENCY, JobWorker
+from logging_config import configure_logging
+from media import JOB_FAILURE_HANDLERS, JOB_HANDLERS
+
+logger = logging.getLogger(__name__)
+
+
+async def run_worker(concurrency: int = WORKER_CONCURRENCY):
+    """Drain the job queue outside the API process until SIGINT/SIGTERM; jobs are claimed atomically."""
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+    worker = JobWorker(JOB_HANDLERS, on_failure=JOB_FAILURE_HANDLERS, concurrency=max(concurrency, 1))
+    worker.start(db_instance)
+    logger.info("Job worker started with %s concurrent jobs", worker.concurrency)
+    try:
+        await stopping.wait()
+    finally:
+        await worker.stop()
+        logger.info("Job worker stopped")
+
+
+if __name__ == "__main__":
+    configure_logging()
+    asyncio.run(run_worker())
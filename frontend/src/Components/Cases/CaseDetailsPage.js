@@ -144,7 +144,9 @@ const CaseDetailsPage = () => {
                     {caseData.attachments.map((attachment, index) => (
                         <li key={index} style={{marginBottom: '5px', display: 'flex', alignItems: 'center', gap: '8px', padding: '5px 0'}}>
                             📄 <a 
-                                href={`${api.defaults.baseURL}/attachments/${attachment.filename}`} 
+                                href={attachment.sha256
+                                    ? `${api.defaults.baseURL}/evidence/${attachment.sha256}`
+                                    : `${api.defaults.baseURL}/attachments/${attachment.filename}`} 
                                 target="_blank" 
                                 rel="noopener noreferrer"
                                 style={{color: '#2196f3', textDecoration: 'none'}}
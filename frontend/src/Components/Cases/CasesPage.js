@@ -44,6 +44,7 @@ const CasesPage = () => {
     if (filters.priority) params.append('priority', filters.priority);
     if (filters.searchTerm) params.append('search_term', filters.searchTerm); 
     if (filters.dateOccurred) params.append('date_occurred', filters.dateOccurred); 
+    params.append('view', 'summary');
 
     try {
       const res = await api.get(`/cases/?${params.toString()}`);
@@ -1,5 +1,5 @@
 // src/SubmitReportForm.js
-import React, { useState, useEffect } from "react";
+import React, { useState, useEffect, useRef } from "react";
 import 'leaflet/dist/leaflet.css';
 import { MapContainer, TileLayer, Marker, Popup, useMapEvents } from 'react-leaflet';
 import L from 'leaflet';
@@ -86,6 +86,8 @@ function SubmitReportForm() {
     });
 
     const [isSubmitting, setIsSubmitting] = useState(false);
+    // Reused when a submission is retried after a network failure so the server does not create it twice.
+    const idempotencyKey = useRef(null);
 
     useEffect(() => {
         setIsClient(true);
@@ -250,15 +252,22 @@ function SubmitReportForm() {
             });
         }
 
+        if (!idempotencyKey.current) {
+            idempotencyKey.current = crypto.randomUUID();
+        }
+
         try {
             const token = localStorage.getItem("jwt_token");
             const res = await fetch("http://localhost:8006/reports/", {
                 method: "POST",
                 headers: {
-                    Authorization: `Bearer ${token || ""}`
+                    Authorization: `Bearer ${token || ""}`,
+                    "Idempotency-Key": idempotencyKey.current
                 },
                 body: formData,
             });
+            // The server answered, so the next submission is a new request.
+            idempotencyKey.current = null;
 
             const result = await res.json();
             if (!res.ok) {
@@ -0,0 +1,94 @@
+// src/geodataFormat.js
+// Reader for the columnar binary geodata returned by /analytics/geodata?format=binary.
+// The layout is documented in backend/geodata_formats.py (encode_binary).
+
+const MAGIC = 'PRMG';
+const VERSION = 1;
+const CLUSTERED = 1;
+const TRUNCATED = 2;
+const NO_VALUE = 0xffff;
+const HEADER_BYTES = 12;
+
+const readStrings = (view, offset, decoder) => {
+  const count = view.getUint16(offset, true);
+  offset += 2;
+  const values = [];
+  for (let i = 0; i < count; i += 1) {
+    const length = view.getUint16(offset, true);
+    offset += 2;
+    values.push(decoder.decode(new Uint8Array(view.buffer, view.byteOffset + offset, length)));
+    offset += length;
+  }
+  return [values, offset];
+};
+
+// Returns { clustered, truncated, count, coordinates, counts, sources, statuses, violationTypes, ... } where
+// coordinates is a Float32Array of lng/lat pairs and the other columns are typed arrays of dictionary codes.
+export const decodeGeodata = (buffer) => {
+  const view = new DataView(buffer);
+  const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4));
+  if (magic !== MAGIC || view.getUint8(4) !== VERSION) {
+    throw new Error('Unsupported geodata format');
+  }
+  const flags = view.getUint8(5);
+  const n = view.getUint32(8, true);
+
+  let offset = HEADER_BYTES;
+  const coordinates = new Float32Array(buffer, offset, 2 * n);
+  offset += 8 * n;
+  const counts = new Uint32Array(buffer, offset, n);
+  offset += 4 * n;
+  const typeOffsets = new Uint32Array(buffer, offset, n + 1);
+  offset += 4 * (n + 1);
+  const sourceCodes = new Uint16Array(buffer, offset, n);
+  offset += 2 * n;
+  const statusCodes = new Uint16Array(buffer, offset, n);
+  offset += 2 * n;
+  const typeCodes = new Uint16Array(buffer, offset, typeOffsets[n]);
+  offset += 2 * typeOffsets[n];
+  offset += (4 - (offset % 4)) % 4;
+
+  const decoder = new TextDecoder();
+  let sources;
+  let statuses;
+  let violationTypes;
+  [sources, offset] = readStrings(view, offset, decoder);
+  [statuses, offset] = readStrings(view, offset, decoder);
+  [violationTypes] = readStrings(view, offset, decoder);
+
+  return {
+    clustered: Boolean(flags & CLUSTERED),
+    truncated: Boolean(flags & TRUNCATED),
+    count: n,
+    coordinates,
+    counts,
+    typeOffsets,
+    sourceCodes,
+    statusCodes,
+    typeCodes,
+    sources,
+    statuses,
+    violationTypes,
+  };
+};
+
+const lookup = (values, code) => (code === NO_VALUE ? null : values[code]);
+
+// Expands decoded columns into the objects the JSON format returns, for code that wants per-feature access.
+export const geodataFeatures = (decoded) => {
+  const features = [];
+  for (let i = 0; i < decoded.count; i += 1) {
+    const types = [];
+    for (let j = decoded.typeOffsets[i]; j < decoded.typeOffsets[i + 1]; j += 1) {
+      types.push(lookup(decoded.violationTypes, decoded.typeCodes[j]));
+    }
+    features.push({
+      coordinates: [decoded.coordinates[2 * i], decoded.coordinates[2 * i + 1]],
+      count: decoded.counts[i],
+      source: lookup(decoded.sources, decoded.sourceCodes[i]),
+      status: lookup(decoded.statuses, decoded.statusCodes[i]),
+      violation_types: decoded.clustered ? types.map(name => ({ violation_type: name })) : types,
+    });
+  }
+  return features;
+};
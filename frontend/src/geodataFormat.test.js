@@ -0,0 +1,74 @@
+/**
+ * @jest-environment node
+ */
+import { decodeGeodata, geodataFeatures } from './geodataFormat';
+
+// Produced by backend/geodata_formats.py encode_binary(); regenerate both fixtures if the layout changes.
+//   points:   encode_binary(POINTS, clustered=False, truncated=True)
+//   clusters: encode_binary(CLUSTERS, clustered=True)
+const POINTS_BINARY = 'UFJNRwECAAADAAAAAd4JQnsD/EHU2gxCeiX+QYEEDUJo4gBCAQAAAAEAAAABAAAAAAAAAAIAAAACAAAABAAAAAAAAQAAAAAA//8AAAAAAQACAAAAAgAEAGNhc2UGAHJlcG9ydAEACAB2ZXJpZmllZAMABwBUb3J0dXJlEwBBcmJpdHJhcnkgZGV0ZW50aW9uEQDZh9iv2YUg2YXZhtin2LLZhA==';
+const CLUSTERS_BINARY = 'UFJNRwEBAAACAAAAzcwJQgAA/EEAAA1CAAABQngAAAAHAAAAAAAAAAIAAAACAAAAAAABAP////8AAAEAAgAEAGNhc2UGAHJlcG9ydAAAAgAHAFRvcnR1cmUTAEFyYml0cmFyeSBkZXRlbnRpb24=';
+
+const POINTS = [
+  { coordinates: [34.4668, 31.5017], source: 'case', status: 'verified', violation_types: ['Torture', 'Arbitrary detention'] },
+  { coordinates: [35.2137, 31.7683], source: 'report', status: null, violation_types: [] },
+  { coordinates: [35.2544, 32.2211], source: 'case', status: 'verified', violation_types: ['هدم منازل', 'Torture'] },
+];
+const CLUSTERS = [
+  { coordinates: [34.45, 31.5], count: 120, sources: { case: 80, report: 40 },
+    violation_types: [{ violation_type: 'Torture', count: 70 }, { violation_type: 'Arbitrary detention', count: 30 }] },
+  { coordinates: [35.25, 32.25], count: 7, sources: { report: 7 }, violation_types: [] },
+];
+
+const toArrayBuffer = (base64) => {
+  const bytes = Buffer.from(base64, 'base64');
+  return bytes.buffer.slice(bytes.byteOffset, bytes.byteOffset + bytes.length);
+};
+
+const expectCoordinates = (feature, [lng, lat]) => {
+  // Coordinates travel as float32, about 1e-5 degrees of precision at these magnitudes.
+  expect(feature.coordinates[0]).toBeCloseTo(lng, 4);
+  expect(feature.coordinates[1]).toBeCloseTo(lat, 4);
+};
+
+test('decodes points encoded by the backend', () => {
+  const decoded = decodeGeodata(toArrayBuffer(POINTS_BINARY));
+  expect(decoded.clustered).toBe(false);
+  expect(decoded.truncated).toBe(true);
+  expect(decoded.count).toBe(POINTS.length);
+  expect(decoded.sources).toEqual(['case', 'report']);
+  expect(decoded.statuses).toEqual(['verified']);
+  expect(decoded.violationTypes).toEqual(['Torture', 'Arbitrary detention', 'هدم منازل']);
+
+  const features = geodataFeatures(decoded);
+  features.forEach((feature, i) => {
+    expectCoordinates(feature, POINTS[i].coordinates);
+    expect(feature.count).toBe(1);
+    expect(feature.source).toBe(POINTS[i].source);
+    expect(feature.status).toBe(POINTS[i].status);
+    expect(feature.violation_types).toEqual(POINTS[i].violation_types);
+  });
+});
+
+test('decodes clusters encoded by the backend', () => {
+  const decoded = decodeGeodata(toArrayBuffer(CLUSTERS_BINARY));
+  expect(decoded.clustered).toBe(true);
+  expect(decoded.truncated).toBe(false);
+  expect(decoded.statuses).toEqual([]);
+
+  const features = geodataFeatures(decoded);
+  expect(features).toHaveLength(CLUSTERS.length);
+  features.forEach((feature, i) => {
+    expectCoordinates(feature, CLUSTERS[i].coordinates);
+    expect(feature.count).toBe(CLUSTERS[i].count);
+    // Clusters carry their dominant source and no status.
+    expect(feature.source).toBe(i === 0 ? 'case' : 'report');
+    expect(feature.status).toBeNull();
+    // Only the type names travel in the binary format, not their per-cluster counts.
+    expect(feature.violation_types).toEqual(CLUSTERS[i].violation_types.map(({ violation_type }) => ({ violation_type })));
+  });
+});
+
+test('rejects buffers that are not binary geodata', () => {
+  expect(() => decodeGeodata(new TextEncoder().encode('{"features": []}').buffer)).toThrow('Unsupported geodata format');
+});
@@ -32,6 +32,8 @@ import html2pdf from 'html2pdf.js';
 import * as XLSX from 'xlsx';
 import { saveAs } from 'file-saver';
 
+import { decodeGeodata, geodataFeatures } from '../geodataFormat';
+
 const API_BASE_URL = 'http://localhost:8006';
 
 const DUMMY_PALESTINE_GEOJSON = {
@@ -99,12 +101,28 @@ const FALLBACK_GEODATA_POINTS = [
   },
 ];
 
+const MAP_TILE_SIZE = 256;
+const DEFAULT_MAP_WIDTH = 800;
+const MAX_MAP_ZOOM = 22;
+
+// Web-map zoom level at which `lngSpan` degrees fill `width` pixels, as /analytics/geodata expects.
+const zoomForSpan = (width, lngSpan) =>
+  Math.max(0, Math.min(MAX_MAP_ZOOM, Math.round(Math.log2((width * 360) / (MAP_TILE_SIZE * lngSpan)))));
+
+const viewForBounds = ([[minLng, minLat], [maxLng, maxLat]], width) => ({
+  bbox: [minLng, minLat, maxLng, maxLat].map(v => v.toFixed(5)).join(','),
+  zoom: zoomForSpan(width, maxLng - minLng),
+});
+
+const pointCoordinates = d => d.coordinates || d.location?.coordinates?.coordinates;
+
 const AnalyticsDashboardPage = () => {
   const [violationsData, setViolationsData] = useState([]);
   const [timelineData, setTimelineData] = useState([]);
   const [geodata, setGeodata] = useState([]);
   const [dynamicViolationTypes, setDynamicViolationTypes] = useState([]);
   const [mapGeoJson, setMapGeoJson] = useState(null);
+  const [mapView, setMapView] = useState(() => viewForBounds(d3.geoBounds(DUMMY_PALESTINE_GEOJSON), DEFAULT_MAP_WIDTH));
 
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
@@ -116,6 +134,7 @@ const AnalyticsDashboardPage = () => {
 
   const dashboardRef = useRef(null);
   const mapSvgRef = useRef(null);
+  const mapTransformRef = useRef(d3.zoomIdentity);
 
   const CHART_COLORS = [
     '#4CAF50', '#2196F3', '#FFC107', '#E91E63', '#9C27B0', '#00BCD4', '#FF5722',
@@ -150,16 +169,6 @@ const AnalyticsDashboardPage = () => {
         setTimelineData([]);
       }
 
-      const geodataRes = await axios.get(`${API_BASE_URL}/analytics/geodata`, {
-        params: { year: selectedYear, violation_type: selectedViolationType },
-      });
-      if (geodataRes.data && Array.isArray(geodataRes.data) && geodataRes.data.length > 0) {
-        setGeodata(geodataRes.data);
-      } else {
-        console.warn("Backend geodata is empty or not an array. Using fallback geodata for map display.");
-        setGeodata(FALLBACK_GEODATA_POINTS);
-      }
-
       if (!mapGeoJson) {
         setMapGeoJson(DUMMY_PALESTINE_GEOJSON);
       }
@@ -182,6 +191,30 @@ const AnalyticsDashboardPage = () => {
     fetchData();
   }, [fetchData]);
 
+  // Clusters (or, zoomed in, individual points) for the visible part of the map only.
+  const fetchGeodata = useCallback(async () => {
+    try {
+      const geodataRes = await axios.get(`${API_BASE_URL}/analytics/geodata`, {
+        params: { year: selectedYear, violation_type: selectedViolationType, bbox: mapView.bbox, zoom: mapView.zoom, format: 'binary' },
+        responseType: 'arraybuffer',
+      });
+      const features = geodataFeatures(decodeGeodata(geodataRes.data));
+      if (features.length > 0) {
+        setGeodata(features);
+      } else {
+        console.warn("Backend geodata is empty or not an array. Using fallback geodata for map display.");
+        setGeodata(FALLBACK_GEODATA_POINTS);
+      }
+    } catch (err) {
+      console.error("Error fetching geodata:", err);
+      setGeodata(FALLBACK_GEODATA_POINTS);
+    }
+  }, [selectedYear, selectedViolationType, mapView]);
+
+  useEffect(() => {
+    fetchGeodata();
+  }, [fetchGeodata]);
+
   useEffect(() => {
     if (!mapSvgRef.current || !mapGeoJson || geodata.length === 0) {
       return;
@@ -209,36 +242,43 @@ const AnalyticsDashboardPage = () => {
       .attr("stroke-width", 0.5);
 
     svg.selectAll("circle")
-      .data(geodata)
+      .data(geodata.filter(d => pointCoordinates(d)?.length === 2))
       .enter()
       .append("circle")
-      .attr("cx", d => {
-        if (d.location?.coordinates?.coordinates && d.location.coordinates.coordinates.length === 2) {
-          return projection([d.location.coordinates.coordinates[0], d.location.coordinates.coordinates[1]])[0];
-        }
-        return 0;
-      })
-      .attr("cy", d => {
-        if (d.location?.coordinates?.coordinates && d.location.coordinates.coordinates.length === 2) {
-          return projection([d.location.coordinates.coordinates[0], d.location.coordinates.coordinates[1]])[1];
-        }
-        return 0;
-      })
-      .attr("r", 5)
+      .attr("cx", d => projection(pointCoordinates(d))[0])
+      .attr("cy", d => projection(pointCoordinates(d))[1])
+      .attr("r", d => (d.count > 1 ? 5 + 2 * Math.sqrt(d.count) : 5))
       .attr("fill", "red")
+      .attr("fill-opacity", d => (d.count > 1 ? 0.6 : 1))
       .attr("stroke", "white")
       .attr("stroke-width", 1)
       .append("title")
-      .text(d => `Violation: ${d.violation_type}\nLocation: ${d.location?.city || 'N/A'}, ${d.location?.region || 'N/A'}`);
+      .text(d => {
+        if (d.count > 1) {
+          const top = (d.violation_types || []).map(t => (t.count ? `${t.violation_type} (${t.count})` : t.violation_type)).join(', ');
+          return `${d.count} incidents\nMost reported: ${top || 'N/A'}`;
+        }
+        const types = d.violation_types ? d.violation_types.join(', ') : d.violation_type;
+        return `Violation: ${types}\nLocation: ${d.title || d.location?.city || 'N/A'}${d.location?.region ? `, ${d.location.region}` : ''}`;
+      });
 
     const zoom = d3.zoom()
       .scaleExtent([1, 8])
       .on('zoom', (event) => {
         svg.selectAll('path').attr('transform', event.transform);
         svg.selectAll('circle').attr('transform', event.transform);
+      })
+      .on('end', (event) => {
+        mapTransformRef.current = event.transform;
+        const topLeft = projection.invert(event.transform.invert([0, 0]));
+        const bottomRight = projection.invert(event.transform.invert([width, height]));
+        const view = viewForBounds([[topLeft[0], bottomRight[1]], [bottomRight[0], topLeft[1]]], width);
+        // Redrawing re-applies the same transform; only a new viewport should trigger a refetch.
+        setMapView(current => (current.bbox === view.bbox && current.zoom === view.zoom ? current : view));
       });
 
     svg.call(zoom);
+    svg.call(zoom.transform, mapTransformRef.current);
 
   }, [mapGeoJson, geodata]);
 
@@ -576,7 +616,7 @@ const AnalyticsDashboardPage = () => {
                   )}
                 </Box>
                 <Typography variant="body2" color="text.secondary" sx={{ mt: 2, textAlign: 'center' }}>
-                  Total geodata points: <Box component="span" sx={{ fontWeight: 'bold' }}>{geodata.length}</Box>
+                  Total geodata points: <Box component="span" sx={{ fontWeight: 'bold' }}>{geodata.reduce((total, d) => total + (d.count || 1), 0)}</Box>
                 </Typography>
               </Paper>
             </Grid>
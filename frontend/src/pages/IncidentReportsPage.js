@@ -96,6 +96,7 @@ const IncidentReportsPage = () => {
       }
       if (filters.location) queryParams.append('location', filters.location);
       queryParams.append('limit', limit);
+      queryParams.append('view', 'summary');
 
       const response = await fetch(`${API_BASE_URL}/reports/?${queryParams.toString()}`);
       if (!response.ok) {